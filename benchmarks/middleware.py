@@ -0,0 +1,77 @@
+"""
+Cost of a middleware stack per request, for stacks of 0, 5 and 20 trivial
+middlewares, compiled (`@middleware`) and run with `run_middleware_stack`.
+
+    python benchmarks/middleware.py [--requests N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ziplineio.middleware import middleware, run_middleware_stack  # noqa: E402
+from ziplineio.request import Request  # noqa: E402
+from ziplineio.utils import call_handler  # noqa: E402
+
+
+async def passthrough(req):
+    return req
+
+
+async def with_ctx(req, ctx):
+    return req, {"user": 1}
+
+
+async def handler(req, ctx):
+    return "ok"
+
+
+def stack(size: int):
+    return [passthrough if i % 2 else with_ctx for i in range(size)]
+
+
+async def compiled(size: int):
+    wrapped = middleware(stack(size))(handler)
+    return lambda req: wrapped(req)
+
+
+async def uncompiled(size: int):
+    middlewares = stack(size)
+
+    async def run(req):
+        req, kwargs, res = await run_middleware_stack(middlewares, req=req)
+        if res is not None:
+            return res
+        return await call_handler(handler, req=req, **kwargs)
+
+    return run
+
+
+async def measure(factory, size: int, requests: int) -> float:
+    call = await factory(size)
+    req = Request("GET", "/")
+    for _ in range(min(requests, 1000)):
+        await call(req)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(req)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int) -> None:
+    print(f"{'middlewares':>12} {'compiled':>12} {'uncompiled':>12}")
+    for size in (0, 5, 20):
+        fast = await measure(compiled, size, requests)
+        slow = await measure(uncompiled, size, requests)
+        print(f"{size:>12} {fast:>10.2f}us {slow:>10.2f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
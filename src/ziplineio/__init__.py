@@ -1,6 +1,7 @@
 from .app import App
 from .middleware import middleware
 from .dependency_injector import inject
+from .inline import inline
 
 
 class ZipLine(App):
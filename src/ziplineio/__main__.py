@@ -0,0 +1,4 @@
+from ziplineio.serve import main
+
+if __name__ == "__main__":
+    main()
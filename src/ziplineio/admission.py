@@ -0,0 +1,131 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+from ziplineio.exception import ServiceUnavailableHttpException
+
+# Priority classes, from most to least important. "critical" requests (e.g.
+# health checks) are never queued nor shed.
+CRITICAL = "critical"
+HIGH = "high"
+NORMAL = "normal"
+LOW = "low"
+_QUEUED_PRIORITIES = (HIGH, NORMAL, LOW)
+
+
+class AdmissionController:
+    """
+    Caps the number of requests handled at once at `max_concurrency`. Requests
+    over the cap wait in a queue (at most `max_queue` of them, no limit if
+    `None`) and are shed with a 503 and a `Retry-After` header when they wait
+    too long.
+
+    How long is too long adapts to the load, CoDel-style: while requests
+    leave the queue quickly, they may wait up to `interval` seconds. Once
+    every request that left the queue over a whole `interval` waited more
+    than `target_delay`, the queue is standing rather than absorbing a burst:
+    requests may then only wait `target_delay`, and "low" priority requests
+    are shed right away, until the queue drains.
+
+    Queued requests are admitted by priority, then first come first served.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int | None = None,
+        target_delay: float = 0.005,
+        interval: float = 0.1,
+        retry_after: int | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.target_delay = target_delay
+        self.interval = interval
+        self.retry_after = retry_after or max(1, math.ceil(interval))
+        self.in_flight = 0
+        self.shed = 0
+        self._queues: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {
+            priority: deque() for priority in _QUEUED_PRIORITIES
+        }
+        self._queued = 0
+        self._overloaded = False
+        self._min_delay = math.inf
+        self._interval_start = time.monotonic()
+
+    @property
+    def overloaded(self) -> bool:
+        return self._overloaded
+
+    def _observe(self, delay: float) -> None:
+        # Track the smallest queue delay over each interval: if even that is
+        # above the target, the queue isn't draining.
+        now = time.monotonic()
+        if now - self._interval_start >= self.interval:
+            self._overloaded = self._min_delay > self.target_delay
+            self._min_delay = math.inf
+            self._interval_start = now
+        self._min_delay = min(self._min_delay, delay)
+
+    async def acquire(self, priority: str = NORMAL) -> bool:
+        """Wait for a slot. Returns `False` if the request is shed."""
+        if priority == CRITICAL:
+            return True
+        if self.in_flight < self.max_concurrency and self._queued == 0:
+            self.in_flight += 1
+            self._observe(0.0)
+            return True
+
+        if (self._overloaded and priority == LOW) or (
+            self.max_queue is not None and self._queued >= self.max_queue
+        ):
+            self.shed += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].append((future, time.monotonic()))
+        self._queued += 1
+        timeout = self.target_delay if self._overloaded else self.interval
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._observe(timeout)
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            # the slot may have been handed over just before
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            if not future.done() or future.cancelled():
+                self._remove(priority, future)
+        return True
+
+    def _remove(self, priority: str, future: asyncio.Future) -> None:
+        queue = self._queues[priority]
+        for i, (queued, _) in enumerate(queue):
+            if queued is future:
+                del queue[i]
+                self._queued -= 1
+                return
+
+    def release(self, priority: str = NORMAL) -> None:
+        """Free the slot of a finished request, handing it to the next in line."""
+        if priority == CRITICAL:
+            return
+        for queued_priority in _QUEUED_PRIORITIES:
+            queue = self._queues[queued_priority]
+            while queue:
+                future, enqueued_at = queue.popleft()
+                self._queued -= 1
+                if not future.done():
+                    self._observe(time.monotonic() - enqueued_at)
+                    future.set_result(None)
+                    return
+        self.in_flight -= 1
+
+    def rejection(self) -> ServiceUnavailableHttpException:
+        return ServiceUnavailableHttpException(retry_after=self.retry_after)
@@ -1,58 +1,188 @@
+import asyncio
 import inspect
-from typing import Any, Callable, List, Tuple, Type
+import re
+import traceback
+from typing import Any, Callable, Dict, List, Pattern, Tuple, Type
+
+from ziplineio.admission import NORMAL, AdmissionController
+from ziplineio.background import BackgroundTaskRunner
 
 from ziplineio.exception import NotFoundHttpException
-from ziplineio.middleware import run_middleware_stack
+from ziplineio.executor import (
+    DefaultThreadExecutor,
+    Executor,
+    InlineExecutor,
+    run_on,
+)
+from ziplineio.middleware import run_after_hooks, run_middleware_stack
 from ziplineio.dependency_injector import inject, injector, DependencyInjector
 from ziplineio import settings
 from ziplineio.handler import Handler
 from ziplineio.request import Request
 from ziplineio.request_context import set_request
 from ziplineio.response import Response, NotFoundResponse, format_response
+from ziplineio.process_pool import SyncExecutor
 from ziplineio.router import Router
-from ziplineio.static import staticfiles
+from ziplineio.service import Service
+from ziplineio.timeout import call_with_timeout
+from ziplineio.timing import Timings, _timings_var
 from ziplineio.utils import call_handler, parse_scope
 
 
 class App:
     _router: Router
     _injector: DependencyInjector
+    _executors: Dict[str, Executor]
 
     def __init__(self) -> None:
         self._router = Router()
         self._injector = injector
+        self._executors = {
+            "inline": InlineExecutor(),
+            "thread": DefaultThreadExecutor(),
+        }
+        # executors that routes run on, started at lifespan startup
+        self._used_executors = set()
+        self._startup_hooks: List[Callable] = []
+        self._shutdown_hooks: List[Callable] = []
+        self._admission: AdmissionController | None = None
+        self._background = BackgroundTaskRunner(
+            settings.BACKGROUND_TASKS_MAX_CONCURRENCY,
+            settings.BACKGROUND_TASKS_MAX_PENDING,
+            executor=self._executors["thread"],
+        )
+        # (method, path regex, priority) of routes with a non-default priority
+        self._priorities: List[Tuple[str, Pattern, str]] = []
+        # instances injected through this app, set up at lifespan startup
+        self._services: List[Any] = []
 
     def router(self, prefix: str, router: Router) -> None:
         self._router.add_sub_router(prefix, router)
 
-    def get(self, path: str) -> Callable[[Handler], Callable]:
-        def decorator(handler: Handler) -> Callable:
-            wrapped_handler = self.app_services_wrapper(handler)
-            return self._router.get(path)(wrapped_handler)
-
-        return decorator
-
-    def post(self, path: str) -> Callable[[Handler], Callable]:
-        # return self._router.post(path)
+    def route(
+        self,
+        method: str,
+        path: str,
+        executor: str | None = None,
+        timeout: float | None = None,
+        priority: str | None = None,
+    ) -> Callable[[Handler], Callable]:
         def decorator(handler: Handler) -> Callable:
-            wrapped_handler = self.app_services_wrapper(handler)
-            return self._router.post(path)(wrapped_handler)
+            if priority is not None and priority != NORMAL:
+                regex = re.compile(self._router._convert_path_to_regex(path))
+                self._priorities.append((method, regex, priority))
+            wrapped_handler = handler
+            if executor is not None:
+                wrapped_handler = run_on(self._get_executor(executor), handler)
+                self._used_executors.add(executor)
+            wrapped_handler = self.app_services_wrapper(wrapped_handler)
+            registered = self._router.route(method, path, timeout)(wrapped_handler)
+            # Handlers run on an executor are returned as-is, so that process
+            # pools can pickle them by reference.
+            return handler if executor is not None else registered
 
         return decorator
 
-    def put(self, path: str) -> Callable[[Handler], Callable]:
-        def decorator(handler: Handler) -> Callable:
-            wrapped_handler = self.app_services_wrapper(handler)
-            return self._router.put(path)(wrapped_handler)
-
-        return decorator
-
-    def delete(self, path: str) -> Callable[[Handler], Callable]:
-        def decorator(handler: Handler) -> Callable:
-            wrapped_handler = self.app_services_wrapper(handler)
-            return self._router.delete(path)(wrapped_handler)
-
-        return decorator
+    def get(
+        self,
+        path: str,
+        executor: str | None = None,
+        timeout: float | None = None,
+        priority: str | None = None,
+    ) -> Callable[[Handler], Callable]:
+        return self.route("GET", path, executor, timeout, priority)
+
+    def post(
+        self,
+        path: str,
+        executor: str | None = None,
+        timeout: float | None = None,
+        priority: str | None = None,
+    ) -> Callable[[Handler], Callable]:
+        return self.route("POST", path, executor, timeout, priority)
+
+    def put(
+        self,
+        path: str,
+        executor: str | None = None,
+        timeout: float | None = None,
+        priority: str | None = None,
+    ) -> Callable[[Handler], Callable]:
+        return self.route("PUT", path, executor, timeout, priority)
+
+    def delete(
+        self,
+        path: str,
+        executor: str | None = None,
+        timeout: float | None = None,
+        priority: str | None = None,
+    ) -> Callable[[Handler], Callable]:
+        return self.route("DELETE", path, executor, timeout, priority)
+
+    def executor(self, name: str, executor: Executor) -> None:
+        """Register an executor that routes can run on, e.g. `executor="cpu"`."""
+        self._executors[name] = executor
+
+    def admission(self, controller: AdmissionController | None) -> None:
+        """Limit the requests handled at once, shedding the excess with 503s."""
+        self._admission = controller
+
+    def _priority(self, method: str, path: str) -> str:
+        for route_method, regex, priority in self._priorities:
+            if route_method == method and regex.match(path):
+                return priority
+        return NORMAL
+
+    def _get_executor(self, name: str) -> Executor:
+        if name == "process" and name not in self._executors:
+            # shared with other apps; configured from the settings when it starts
+            return SyncExecutor.get_instance()
+        if name not in self._executors:
+            raise ValueError(f"Unknown executor: {name}")
+        return self._executors[name]
+
+    def on_startup(self, hook: Callable) -> Callable:
+        """Register a sync or async function to run at lifespan startup."""
+        self._startup_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook: Callable) -> Callable:
+        """Register a sync or async function to run at lifespan shutdown."""
+        self._shutdown_hooks.append(hook)
+        return hook
+
+    async def startup(self) -> None:
+        """
+        Start the executors routes run on, set up the injected services, then
+        run the startup hooks. Called at lifespan startup.
+        """
+        SyncExecutor.get_instance().acquire()
+        for name in self._used_executors:
+            self._get_executor(name).start()
+        for service in self._lifespan_services():
+            await _call_hook(service.setup)
+        for hook in self._startup_hooks:
+            await _call_hook(hook)
+
+    async def shutdown(self) -> None:
+        """
+        Wait for background tasks, run the shutdown hooks, tear down the
+        injected services, then shut down its executors, waiting for running
+        calls to finish. The shared process pool only shuts down with the last
+        app using it.
+        """
+        try:
+            await self._background.join()
+            for hook in self._shutdown_hooks:
+                await _call_hook(hook)
+            for service in reversed(self._lifespan_services()):
+                await _call_hook(service.teardown)
+        finally:
+            for executor in self._executors.values():
+                await asyncio.to_thread(executor.shutdown)
+            process_pool = SyncExecutor.get_instance()
+            if process_pool.release():
+                await asyncio.to_thread(process_pool.shutdown)
 
     def not_found(self, handler: Handler) -> None:
         self._router.not_found(handler)
@@ -87,35 +217,70 @@ class App:
     ) -> Callable[[Callable], Callable]:
         if isinstance(service_class, list):
             for service in service_class:
-                self._injector.add_injected_service(service, name, "app")
+                self.inject(service, name)
             return None
-        return self._injector.add_injected_service(service_class, name, "app")
+        instance, service_name = self._injector.add_injected_service(
+            service_class, name, "app"
+        )
+        self._services.append(instance)
+        return instance, service_name
+
+    def _lifespan_services(self) -> List[Service]:
+        """
+        The services injected through this app and its routers, in order of
+        injection: the injector's scopes are shared with every other app.
+        """
+        services = []
+        for service in self._services + self._router._all_services():
+            if isinstance(service, Service) and not any(
+                service is instance for instance in services
+            ):
+                services.append(service)
+        return services
 
     def middleware(self, middlewares: List[Callable]) -> None:
         self._router.middleware(middlewares)
 
     def static(self, path: str, path_prefix: str = "/static") -> None:
-        self.middleware([staticfiles(path, path_prefix)])
+        self._router.static(path, path_prefix)
 
     async def _get_and_call_handler(
         self, method: str, path: str, req: Request
     ) -> Callable:
+        timings = _timings_var.get()
+
         # Retrieve the handler and path parameters for the given method and path
+        if timings is not None:
+            timings.start("route")
         handler, path_params = self.get_handler(method, path)
         req.path_params = path_params
+        if timings is not None:
+            timings.stop()
 
         # set request context
         set_request(req)
 
         if handler is not None:
-            # If a handler is found, call it with the request
-            return await call_handler(handler, req=req)
+            if timings is not None:
+                timings.start("handler")
+            try:
+                # If a handler is found, call it with the request, with the
+                # app-wide timeout unless the route has its own
+                if settings.REQUEST_TIMEOUT is not None and not hasattr(
+                    handler, "_timeout"
+                ):
+                    return await call_with_timeout(
+                        handler, settings.REQUEST_TIMEOUT, req=req
+                    )
+                return await call_handler(handler, req=req)
+            finally:
+                if timings is not None:
+                    timings.stop()
 
         # If no handler was found, attempt to run middlewares.
         # (If a handler was found, middlewares will be run by `call_handler`)
-        req, ctx, res = await run_middleware_stack(
-            self._router._router_level_middelwares, req=req
-        )
+        middlewares = self._router._router_level_middelwares
+        req, ctx, res = await run_middleware_stack(middlewares, req=req)
 
         # If middleware does not provide a response, return a 404 Not Found
         # return res if res is not None else NotFoundHttpException()
@@ -125,30 +290,123 @@ class App:
         if self._router._not_found_handler:
             response = await call_handler(self._router._not_found_handler, req=req)
             headers = isinstance(response, Response) and response._headers or {}
-            return NotFoundResponse(response, headers)
+            response = NotFoundResponse(response, headers)
+        else:
+            response = NotFoundHttpException()
 
-        return NotFoundHttpException()
+        # as for a matched route, the middlewares' after hooks see the response
+        return await run_after_hooks(middlewares, req, response, ctx.get("ctx", {}))
 
     def __call__(self, *args: Any, **kwds: Any) -> Any:
         async def uvicorn_handler(scope: dict, receive: Any, send: Any) -> None:
             if scope["type"] == "http":
-                req = await parse_scope(scope, receive)
-                response = await self._get_and_call_handler(req.method, req.path, req)
-                raw_response = format_response(response, settings.DEFAULT_HEADERS)
-
-                await send(
-                    {
-                        "type": "http.response.start",
-                        "status": raw_response["status"],
-                        "headers": raw_response["headers"],
-                    }
-                )
-
-                await send(
-                    {
-                        "type": "http.response.body",
-                        "body": raw_response["body"],
-                    }
-                )
+                admission = self._admission
+                if admission is None:
+                    await self._handle_http(scope, receive, send)
+                    return
+
+                # Admission comes before parsing, so shed requests cost little
+                priority = self._priority(scope["method"], scope["path"])
+                if not await admission.acquire(priority):
+                    await self._send(send, admission.rejection())
+                    return
+                try:
+                    await self._handle_http(scope, receive, send)
+                finally:
+                    admission.release(priority)
+
+            elif scope["type"] == "lifespan":
+                await self._lifespan(receive, send)
 
         return uvicorn_handler
+
+    async def _handle_http(self, scope: dict, receive: Any, send: Any) -> None:
+        token = self._background.collect()
+        sent = False
+        timings = timings_token = None
+        if settings.SERVER_TIMING:
+            timings = Timings()
+            timings_token = _timings_var.set(timings)
+        try:
+            if timings is not None:
+                timings.start("parse")
+            req = await parse_scope(scope, receive)
+            if timings is not None:
+                timings.stop()
+            response = await self._get_and_call_handler(req.method, req.path, req)
+            await self._send(send, response)
+            sent = True
+            if timings is not None:
+                await _report_timings(req, timings)
+        finally:
+            if timings_token is not None:
+                _timings_var.reset(timings_token)
+            # only once the response was sent
+            if sent:
+                self._background.schedule(token)
+            else:
+                self._background.discard(token)
+
+    async def _send(self, send: Any, response: Any) -> None:
+        timings = _timings_var.get()
+        if timings is None:
+            raw_response = format_response(response, settings.DEFAULT_HEADERS)
+            headers = raw_response["headers"]
+        else:
+            timings.start("serialize")
+            raw_response = format_response(response, settings.DEFAULT_HEADERS)
+            timings.stop()
+            timings.finish()
+            headers = raw_response["headers"]
+            if settings.SERVER_TIMING_HEADER:
+                headers = headers + [(b"server-timing", timings.header().encode())]
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": raw_response["status"],
+                "headers": headers,
+            }
+        )
+
+        await send(
+            {
+                "type": "http.response.body",
+                "body": raw_response["body"],
+            }
+        )
+
+    async def _lifespan(self, receive: Any, send: Any) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                try:
+                    await self.shutdown()
+                except Exception as e:
+                    await send({"type": "lifespan.shutdown.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+async def _call_hook(hook: Callable) -> None:
+    result = hook()
+    if inspect.isawaitable(result):
+        await result
+
+
+async def _report_timings(req: Request, timings: Timings) -> None:
+    sink = settings.SERVER_TIMING_SINK
+    if sink is None:
+        return
+    try:
+        await _call_hook(lambda: sink(req, timings))
+    except Exception:
+        traceback.print_exc()
@@ -0,0 +1,111 @@
+import asyncio
+import inspect
+import traceback
+import warnings
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Deque, List, Set, Tuple
+
+from ziplineio.executor import Executor
+
+# The tasks added while handling the current request
+_tasks_var: ContextVar[List[Tuple[Callable, tuple, dict]] | None] = ContextVar(
+    "background_tasks", default=None
+)
+
+
+class BackgroundTasks:
+    """
+    Functions to call after the response is sent, e.g. to send a webhook
+    without making the client wait for it. Inject it (`app.inject(
+    BackgroundTasks)`) and add tasks from handlers; each request gets its own
+    list of tasks, run in the order they were added.
+    """
+
+    name = "background_tasks"
+
+    def add(self, func: Callable, *args, **kwargs) -> None:
+        tasks = _tasks_var.get()
+        if tasks is None:
+            raise RuntimeError("Background tasks can only be added during a request")
+        tasks.append((func, args, kwargs))
+
+
+class BackgroundTaskRunner:
+    """
+    Runs requests' background tasks, for at most `max_concurrency` requests at
+    a time. At most `max_pending` more requests' tasks wait for their turn (no
+    limit if `None`); past that, they are dropped with a `RuntimeWarning`.
+    Async tasks run on the event loop and sync ones on `executor` (a thread
+    if `None`). An exception in a task is printed, and the request's other
+    tasks still run.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 100,
+        max_pending: int | None = None,
+        executor: Executor | None = None,
+    ):
+        self._max_concurrency = max_concurrency
+        self._max_pending = max_pending
+        self._executor = executor
+        self._pending: Deque[List[Tuple[Callable, tuple, dict]]] = deque()
+        self._running: Set[asyncio.Task] = set()
+        # workers that haven't run out of pending tasks yet
+        self._workers = 0
+        # requests whose tasks were dropped because too many were pending
+        self.dropped = 0
+
+    def collect(self):
+        """Start collecting the tasks of a request. Returns a token for `schedule`."""
+        return _tasks_var.set([])
+
+    def schedule(self, token) -> None:
+        """Run the tasks collected since `collect`, in the background."""
+        tasks = _tasks_var.get()
+        _tasks_var.reset(token)
+        if not tasks:
+            return
+        if self._max_pending is not None and len(self._pending) >= self._max_pending:
+            self.dropped += 1
+            warnings.warn(
+                "Too many background tasks pending: dropped a request's tasks",
+                RuntimeWarning,
+            )
+            return
+        self._pending.append(tasks)
+        if self._workers < self._max_concurrency:
+            self._workers += 1
+            task = asyncio.get_running_loop().create_task(self._work())
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def discard(self, token) -> None:
+        """Drop the tasks collected since `collect`, e.g. if no response was sent."""
+        _tasks_var.reset(token)
+
+    async def _work(self) -> None:
+        # each worker runs requests' tasks until none are left
+        try:
+            while self._pending:
+                await self._run(self._pending.popleft())
+        finally:
+            self._workers -= 1
+
+    async def _run(self, tasks: List[Tuple[Callable, tuple, dict]]) -> None:
+        for func, args, kwargs in tasks:
+            try:
+                if inspect.iscoroutinefunction(func):
+                    await func(*args, **kwargs)
+                elif self._executor is not None:
+                    await self._executor.run(func, *args, **kwargs)
+                else:
+                    await asyncio.to_thread(func, *args, **kwargs)
+            except Exception:
+                traceback.print_exc()
+
+    async def join(self) -> None:
+        """Wait for the background tasks scheduled so far to finish."""
+        while self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
@@ -0,0 +1,8 @@
+from .base import BaseCache, get_cache, set_cache
+from .memory import MemoryCache
+from .decorator import CacheKey, cache
+from .shared import SharedMemoryCache
+from .disk import DiskCache, TieredCache
+from .stats import get_handler_stats, metrics_handler, render_metrics
+from .http import http_cache
+from .resp import RedisCache, RespError
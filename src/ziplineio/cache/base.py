@@ -0,0 +1,50 @@
+from typing import Any, Dict, Iterable, Union
+
+
+class BaseCache:
+    pass
+
+    async def get(self, key: str) -> Any:
+        pass
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        duration: Union[int, float] = 0,
+        tags: Iterable[str] = (),
+    ) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        pass
+
+    async def clear(self) -> None:
+        pass
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Delete every entry set with any of `tags`. Returns how many were deleted."""
+        pass
+
+    async def invalidate_prefix(self, prefix: str) -> int:
+        """Delete every entry whose key starts with `prefix`."""
+        pass
+
+    async def stats(self) -> Dict[str, Any]:
+        """Counters (hits, misses, evictions, ...) and current size of the cache."""
+        return {}
+
+
+_cache: BaseCache = None
+
+
+def get_cache() -> BaseCache:
+    """Get the cache instance."""
+    return _cache
+
+
+def set_cache(cache: BaseCache) -> None:
+    """Set the cache instance."""
+    global _cache
+    _cache = cache
+    return None
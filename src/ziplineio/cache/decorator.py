@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import time
+from collections.abc import Callable
+from typing import Any, Dict, List, NamedTuple, Set, Union
+
+from ziplineio import settings
+from ziplineio.cache.base import get_cache
+from ziplineio.cache.stats import handler_stats
+from ziplineio.exception import BaseHttpException
+from ziplineio.request import Request
+from ziplineio.request_context import get_request
+from ziplineio.response import EncodedResponse, format_response
+from ziplineio.timing import _timings_var
+from ziplineio.utils import call_handler
+
+
+class CacheKey:
+    """
+    Declarative cache key spec: which parts of a request the cached value
+    varies on.
+
+    `query` is `True` for all query params (order-insensitive), `False` for
+    none, or a list of param names. `headers` is a list of header names
+    (case-insensitive), e.g. `["Accept-Language", "Authorization"]`.
+    """
+
+    def __init__(
+        self,
+        path: bool = True,
+        query: Union[bool, List[str]] = True,
+        headers: List[str] = (),
+    ):
+        self.path = path
+        self.query = sorted(query) if isinstance(query, (list, tuple)) else query
+        self.headers = [h.lower() for h in headers]
+
+    def __call__(self, req: Request) -> str:
+        if self.query is True:
+            query = sorted(req.query_params.items())
+        elif self.query:
+            query = [(name, req.query_params.get(name)) for name in self.query]
+        else:
+            query = ()
+
+        if self.headers:
+            lowered = {k.lower(): v for k, v in req.headers.items()}
+            headers = [lowered.get(name) for name in self.headers]
+        else:
+            headers = ()
+
+        return repr((req.path if self.path else None, query, headers))
+
+
+def _make_key(func_id: str, key_func: Callable[[Request], str], req: Request) -> str:
+    """
+    Hash the key material into a fixed-size digest. The request path is kept
+    as a readable prefix when the key varies on it.
+    """
+    material = f"{func_id}\x00{key_func(req)}".encode("utf-8")
+    digest = hashlib.blake2b(material, digest_size=16).hexdigest()
+    if isinstance(key_func, CacheKey) and key_func.path:
+        return f"{req.path}#{digest}"
+    return digest
+
+
+def _is_server_error(result: Any) -> bool:
+    """
+    Whether a handler result is a failure to serve, as opposed to an expected
+    HTTP error such as a 404: an unexpected exception or a 5xx.
+    """
+    if isinstance(result, BaseHttpException):
+        return result.status_code >= 500
+    return isinstance(result, Exception)
+
+
+def _make_tags(
+    tags: List[Union[str, Callable[[Request], str]]], req: Request
+) -> List[str]:
+    """
+    Resolve the tags of an entry: strings are formatted with the path params
+    (e.g. `"user:{id}"`), callables are called with the request.
+    """
+    return [
+        tag(req) if callable(tag) else tag.format(**req.path_params) for tag in tags
+    ]
+
+
+class _CachedValue(NamedTuple):
+    """What the `cache` decorator stores: the value and when it goes stale."""
+
+    value: Any
+    # wall-clock time, so the envelope stays meaningful in shared backends
+    fresh_until: float
+
+
+# Result handed to waiters when the in-flight computation they were waiting on
+# was abandoned (e.g. its request was cancelled); they retry from the top.
+_RETRY = object()
+
+# Strong references to background refreshes, so they aren't garbage collected
+_background_refreshes: Set[asyncio.Task] = set()
+
+
+def cache(
+    duration: Union[int, float] = 0,
+    key: Callable[[Request], str] | None = None,
+    lock_timeout: Union[int, float, None] = None,
+    stale_while_revalidate: Union[int, float] = 0,
+    stale_if_error: Union[int, float] = 0,
+    raw: bool = False,
+    tags: List[Union[str, Callable[[Request], str]]] = (),
+):
+    """
+    Cache decorator that accepts duration in seconds.
+
+    `key` decides which requests share an entry: either a `CacheKey` spec or
+    a callable taking the request and returning a string. By default entries
+    vary on the path and the query params. The result, together with the
+    handler's qualified name, is hashed into a fixed-size digest; keys that
+    vary on the path start with it, followed by `#` and the digest.
+
+    Concurrent misses for the same key are coalesced: the first request
+    computes the value and the others await its result, for at most
+    `lock_timeout` seconds (forever if `None`) before computing it themselves.
+    Errors returned by the handler are passed to every waiter and not cached.
+
+    For `stale_while_revalidate` seconds after an entry expires it is still
+    served, while a background task refreshes it. For `stale_if_error`
+    seconds after it expires it is served in place of a handler error, i.e.
+    an unexpected exception or an HTTP exception with a 5xx status; other HTTP
+    exceptions, such as a 404, are returned as they are.
+
+    With `raw=True` the fully encoded response (status, headers and body
+    bytes) is cached, so hits are sent as-is without being serialized again.
+    The decorated handler's result must then be the route's response, i.e.
+    `cache` must be the outermost decorator below the route. Hits still go
+    through routing and the route's middlewares, e.g. authentication. Headers,
+    `settings.DEFAULT_HEADERS` included, are frozen when the entry is stored.
+
+    `tags` label the entries so they can be dropped together with
+    `get_cache().invalidate_tags(...)`. A tag is either a string formatted
+    with the path params, e.g. `"user:{id}"`, or a callable taking the request.
+    """
+    # keep entries around in the backend for as long as they may be served
+    retention = duration + max(stale_while_revalidate, stale_if_error)
+
+    key_func = key if key is not None else CacheKey()
+
+    def decorator(func: Callable) -> Callable:
+        func_id = f"{func.__module__}.{func.__qualname__}"
+        inflight: Dict[str, asyncio.Future] = {}
+        stats = handler_stats(func_id)
+
+        async def compute(kwargs: dict) -> Any:
+            start = time.perf_counter()
+            result = await call_handler(func, **kwargs)
+            stats.load_time.observe(time.perf_counter() - start)
+            return result
+
+        async def load(key: str, kwargs: dict) -> Any:
+            flight = asyncio.get_running_loop().create_future()
+            inflight[key] = flight
+            try:
+                result = await compute(kwargs)
+                if raw and not isinstance(result, Exception):
+                    result = EncodedResponse(
+                        format_response(result, settings.DEFAULT_HEADERS)
+                    )
+                flight.set_result(result)
+                if not isinstance(result, Exception):
+                    stored = _CachedValue(result, time.time() + duration)
+                    entry_tags = _make_tags(tags, kwargs["req"])
+                    await get_cache().set(key, stored, retention, tags=entry_tags)
+                return result
+            finally:
+                if inflight.get(key) is flight:
+                    del inflight[key]
+                if not flight.done():
+                    flight.set_result(_RETRY)
+
+        async def single_flight(key: str, kwargs: dict) -> Any:
+            flight = inflight.get(key)
+            if flight is None:
+                stats.misses += 1
+                return await load(key, kwargs)
+
+            stats.coalesced += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(flight), lock_timeout)
+            except asyncio.TimeoutError:
+                # don't wait any longer on a slow leader
+                stats.misses += 1
+                return await compute(kwargs)
+
+        async def refresh(key: str, kwargs: dict) -> None:
+            # runs alongside the request that spawned it: don't time it as
+            # part of that request
+            _timings_var.set(None)
+            await load(key, kwargs)
+
+        def revalidate(key: str, kwargs: dict) -> None:
+            if key in inflight:
+                return
+            task = asyncio.get_running_loop().create_task(refresh(key, kwargs))
+            _background_refreshes.add(task)
+            task.add_done_callback(_background_refreshes.discard)
+
+        async def wrapper(*args, **kwargs):
+            req = get_request()
+            key = _make_key(func_id, key_func, req)
+            kwargs = {"req": req, **kwargs}
+
+            while True:
+                # Check if the cache has expired or does not exist
+                stored = await get_cache().get(key)
+                now = time.time()
+                if stored is not None:
+                    if now < stored.fresh_until:
+                        stats.hits += 1
+                        return stored.value
+                    if now < stored.fresh_until + stale_while_revalidate:
+                        stats.stale += 1
+                        revalidate(key, kwargs)
+                        return stored.value
+
+                result = await single_flight(key, kwargs)
+                if result is _RETRY:
+                    continue
+
+                if (
+                    _is_server_error(result)
+                    and stored is not None
+                    and now < stored.fresh_until + stale_if_error
+                ):
+                    stats.stale += 1
+                    return stored.value
+                return result
+
+        wrapper.cache_stats = stats
+        return wrapper
+
+    return decorator
@@ -0,0 +1,346 @@
+import asyncio
+import os
+import pickle
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from ziplineio.cache.base import BaseCache
+from ziplineio.cache.memory import MemoryCache
+from ziplineio.cache.stats import CacheStats
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_key ON tags (key);
+"""
+
+
+class DiskCache(BaseCache):
+    """
+    Cache stored in an SQLite database, so entries survive worker restarts.
+
+    All database work, including (de)serializing values with `serializer`,
+    runs on a dedicated thread, so large values never block the event loop.
+    When `max_bytes` is set, the least recently used entries are deleted to
+    stay under it. Expiry uses the wall clock, since it outlives the process.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int | None = None,
+        serializer: Any = pickle,
+    ):
+        self.path = path
+        self._max_bytes = max_bytes
+        self._serializer = serializer
+        self._stats = CacheStats()
+        # The thread and connection are created on first use in each process:
+        # neither survives fork(), e.g. into `ziplineio serve` workers.
+        self._pid: int | None = None
+        # sqlite connections must stay on one thread
+        self._executor: ThreadPoolExecutor | None = None
+        self._conn: sqlite3.Connection | None = None
+        # inherited from the parent process; kept so they are never closed here
+        self._inherited: List[Tuple[ThreadPoolExecutor, Any]] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _start(self) -> ThreadPoolExecutor:
+        pid = os.getpid()
+        if self._pid != pid:
+            if self._executor is not None:
+                self._inherited.append((self._executor, self._conn))
+            self._pid = pid
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="ziplineio-disk-cache"
+            )
+            self._conn = None
+        return self._executor
+
+    def _call(self, func, *args) -> Any:
+        # on the cache's thread
+        if self._conn is None:
+            self._conn = self._connect()
+        return func(*args)
+
+    async def _run(self, func, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._start(), self._call, func, *args)
+
+    async def get(self, key: str) -> Any:
+        """Get a cache entry."""
+        entry = await self.get_with_expiry(key)
+        return entry[0] if entry is not None else None
+
+    async def get_with_expiry(self, key: str) -> Tuple[Any, float, int] | None:
+        """Get a cache entry with its (wall-clock) expiry time and size."""
+        return await self._run(self._get, key)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        duration: Union[int, float] = 0,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Set a cache entry."""
+        await self.put(key, value, duration, tags)
+
+    async def put(
+        self,
+        key: str,
+        value: Any,
+        duration: Union[int, float] = 0,
+        tags: Iterable[str] = (),
+    ) -> int:
+        """Set a cache entry, returning its serialized size in bytes."""
+        return await self._run(self._set, key, value, duration, tuple(tags))
+
+    async def delete(self, key: str) -> None:
+        """Delete a cache entry."""
+        await self._run(self._delete, key)
+
+    async def clear(self) -> None:
+        """Clears the cache."""
+        await self._run(self._clear)
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Delete every entry set with any of `tags`. Returns how many were deleted."""
+        return len(await self.invalidate_tags_keys(*tags))
+
+    async def invalidate_tags_keys(self, *tags: str) -> List[str]:
+        """Like `invalidate_tags`, but returns the deleted keys."""
+        return await self._run(self._invalidate_tags, tags)
+
+    async def invalidate_prefix(self, prefix: str) -> int:
+        """Delete every entry whose key starts with `prefix`."""
+        return await self._run(self._invalidate_prefix, prefix)
+
+    async def stats(self) -> Dict[str, Any]:
+        """Counters (hits, misses, evictions, ...) and current size of the cache."""
+        entries, size = await self._run(self._size)
+        return {**self._stats.as_dict(), "entries": entries, "bytes": int(size)}
+
+    def close(self) -> None:
+        if self._executor is None or self._pid != os.getpid():
+            return
+        if self._conn is not None:
+            self._executor.submit(self._conn.close).result()
+            self._conn = None
+        self._executor.shutdown()
+        self._executor = None
+        self._pid = None
+
+    def _get(self, key: str) -> Tuple[Any, float, int] | None:
+        row = self._conn.execute(
+            "SELECT value, expires_at, size FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self._stats.misses += 1
+            return None
+
+        now = time.time()
+        value, expires_at, size = row
+        if now >= expires_at:
+            # remove the expired cache entry
+            self._delete(key)
+            self._stats.misses += 1
+            self._stats.expirations += 1
+            return None
+
+        self._stats.hits += 1
+
+        with self._conn:
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return self._serializer.loads(value), expires_at, size
+
+    def _set(
+        self,
+        key: str,
+        value: Any,
+        duration: Union[int, float],
+        tags: Tuple[str, ...],
+    ) -> int:
+        data = self._serializer.dumps(value)
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, data, now + duration, now, len(data)),
+            )
+            self._conn.execute("DELETE FROM tags WHERE key = ?", (key,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tags VALUES (?, ?)", [(t, key) for t in tags]
+            )
+            if self._max_bytes is not None:
+                self._evict(now)
+        return len(data)
+
+    def _evict(self, now: float) -> None:
+        total = self._conn.execute("SELECT total(size) FROM entries").fetchone()[0]
+        if total <= self._max_bytes:
+            return
+
+        expired = self._conn.execute(
+            "DELETE FROM entries WHERE expires_at <= ? RETURNING key", (now,)
+        ).fetchall()
+        self._stats.expirations += len(expired)
+        self._conn.executemany("DELETE FROM tags WHERE key = ?", expired)
+        total = self._conn.execute("SELECT total(size) FROM entries").fetchone()[0]
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at")
+        victims = []
+        for key, size in rows:
+            if total <= self._max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._conn.executemany("DELETE FROM tags WHERE key = ?", victims)
+        self._stats.evictions += len(victims)
+
+    def _size(self) -> Tuple[int, float]:
+        return self._conn.execute(
+            "SELECT count(*), total(size) FROM entries"
+        ).fetchone()
+
+    def _delete(self, key: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM tags WHERE key = ?", (key,))
+
+    def _clear(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM tags")
+
+    def _invalidate_tags(self, tags: Tuple[str, ...]) -> List[str]:
+        placeholders = ",".join("?" * len(tags))
+        with self._conn:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT key FROM tags WHERE tag IN ({placeholders})", tags
+            ).fetchall()
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", rows)
+            # also drops the entries' other tags
+            self._conn.executemany("DELETE FROM tags WHERE key = ?", rows)
+        return [key for (key,) in rows]
+
+    def _invalidate_prefix(self, prefix: str) -> int:
+        # a range scan on the primary key: prefix <= key < prefix + U+10FFFF
+        bounds = (prefix, prefix + "\U0010ffff")
+        with self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM entries WHERE key >= ? AND key < ?", bounds
+            ).rowcount
+            self._conn.execute("DELETE FROM tags WHERE key >= ? AND key < ?", bounds)
+        return deleted
+
+
+class TieredCache(BaseCache):
+    """
+    Two-tier cache: a small in-memory cache in front of a `DiskCache`.
+
+    Every entry is written through to disk. Entries whose serialized size is
+    at most `max_memory_item_size` are also kept in memory; larger ones only
+    live on disk. Small entries evicted from memory remain on disk and are
+    promoted back into memory the next time they are read.
+
+    The memory tier is local to the process. `delete`, `clear` and the
+    invalidation methods drop it only in the process that calls them, so other
+    workers sharing the same disk cache keep serving their in-memory copies
+    until those expire. Set `max_memory_ttl` to bound how long that can be.
+    """
+
+    def __init__(
+        self,
+        disk: DiskCache,
+        memory: MemoryCache | None = None,
+        max_memory_item_size: int = 64 * 1024,
+        max_memory_ttl: float | None = None,
+    ):
+        self.disk = disk
+        self.memory = memory if memory is not None else MemoryCache()
+        self._max_memory_item_size = max_memory_item_size
+        self._max_memory_ttl = max_memory_ttl
+
+    def _memory_duration(self, duration: float) -> float:
+        if self._max_memory_ttl is None:
+            return duration
+        return min(duration, self._max_memory_ttl)
+
+    async def get(self, key: str) -> Any:
+        """Get a cache entry."""
+        value = await self.memory.get(key)
+        if value is not None:
+            return value
+
+        entry = await self.disk.get_with_expiry(key)
+        if entry is None:
+            return None
+
+        value, expires_at, size = entry
+        if size <= self._max_memory_item_size:
+            duration = self._memory_duration(expires_at - time.time())
+            await self.memory.set(key, value, duration)
+        return value
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        duration: Union[int, float] = 0,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Set a cache entry."""
+        size = await self.disk.put(key, value, duration, tags)
+        if size <= self._max_memory_item_size:
+            await self.memory.set(key, value, self._memory_duration(duration))
+        else:
+            await self.memory.delete(key)
+
+    async def delete(self, key: str) -> None:
+        """Delete a cache entry."""
+        await self.memory.delete(key)
+        await self.disk.delete(key)
+
+    async def clear(self) -> None:
+        """Clears the cache."""
+        await self.memory.clear()
+        await self.disk.clear()
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Delete every entry set with any of `tags`. Returns how many were deleted."""
+        # the disk tier holds every entry and its tags
+        keys = await self.disk.invalidate_tags_keys(*tags)
+        for key in keys:
+            await self.memory.delete(key)
+        return len(keys)
+
+    async def invalidate_prefix(self, prefix: str) -> int:
+        """Delete every entry whose key starts with `prefix`."""
+        await self.memory.invalidate_prefix(prefix)
+        return await self.disk.invalidate_prefix(prefix)
+
+    async def stats(self) -> Dict[str, Any]:
+        """Stats of each tier."""
+        return {"memory": await self.memory.stats(), "disk": await self.disk.stats()}
@@ -0,0 +1,122 @@
+import hashlib
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Union
+
+from ziplineio import settings
+from ziplineio.cache.base import BaseCache, get_cache
+from ziplineio.request import Request
+from ziplineio.response import EncodedResponse, RawResponse, format_response
+
+# Statuses a shared cache may store when the response allows it
+_CACHEABLE_STATUSES = {200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501}
+
+
+class _StoredResponse(NamedTuple):
+    raw: RawResponse
+    stored_at: float
+
+
+def parse_cache_control(value: str | None) -> Dict[str, str | None]:
+    """Parse a Cache-Control header into `{directive: argument or None}`."""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def _header(raw: RawResponse, name: bytes) -> str | None:
+    values = [v.decode("latin-1") for k, v in raw["headers"] if k.lower() == name]
+    return ", ".join(values) if values else None
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def http_cache(
+    backend: BaseCache | None = None,
+    default_ttl: Union[int, float] = 0,
+) -> Callable:
+    """
+    Middleware caching complete GET responses the way a shared (reverse
+    proxy) cache would, e.g. `router.middleware([http_cache()])`.
+
+    How long a response is kept comes from its Cache-Control header:
+    `s-maxage`, else `max-age`, else `default_ttl` (0: not cached). Responses
+    marked `private`, `no-store` or `no-cache`, carrying `Set-Cookie`, or with
+    `Vary: *` are never stored; neither are responses to requests with an
+    Authorization header, unless marked `public` or `s-maxage`. Entries vary
+    on the path, the query params and the request headers named in `Vary`.
+
+    Hits are sent as-is, with an Age header. Entries are stored in `backend`,
+    or in the cache configured with `set_cache`.
+    """
+
+    def store_in() -> BaseCache:
+        return backend if backend is not None else get_cache()
+
+    def vary_key(req: Request) -> str:
+        # remembers which request headers the response for this URL varies on
+        return f"{req.path}#{_digest('vary', sorted(req.query_params.items()))}"
+
+    def entry_key(req: Request, vary: List[str]) -> str:
+        headers = {k.lower(): v for k, v in req.headers.items()}
+        query = sorted(req.query_params.items())
+        return f"{req.path}#{_digest(query, [headers.get(h) for h in vary])}"
+
+    def ttl(raw: RawResponse, req: Request) -> Union[int, float]:
+        directives = parse_cache_control(_header(raw, b"cache-control"))
+        if {"private", "no-store", "no-cache"} & directives.keys():
+            return 0
+        if "authorization" in (k.lower() for k in req.headers):
+            if not {"public", "s-maxage"} & directives.keys():
+                return 0
+        for name in ("s-maxage", "max-age"):
+            if name in directives:
+                try:
+                    return max(0, int(directives[name]))
+                except (TypeError, ValueError):
+                    return 0
+        return default_ttl
+
+    async def http_cache_middleware(req: Request):
+        if req.method != "GET":
+            return req
+
+        cache = store_in()
+        vary = await cache.get(vary_key(req))
+        if vary is None:
+            return req
+        stored = await cache.get(entry_key(req, vary))
+        if stored is None:
+            return req
+
+        age = str(max(0, int(time.time() - stored.stored_at))).encode()
+        headers = stored.raw["headers"] + [(b"age", age)]
+        return EncodedResponse({**stored.raw, "headers": headers})
+
+    async def after(req: Request, response: Any):
+        if req.method != "GET" or isinstance(response, Exception):
+            return response
+
+        raw = format_response(response, settings.DEFAULT_HEADERS)
+        if raw["status"] not in _CACHEABLE_STATUSES or _header(raw, b"set-cookie"):
+            return response
+        duration = ttl(raw, req)
+        vary = [h.strip().lower() for h in (_header(raw, b"vary") or "").split(",")]
+        vary = sorted(h for h in vary if h)
+        if duration <= 0 or "*" in vary:
+            return response
+
+        cache = store_in()
+        await cache.set(vary_key(req), vary, duration)
+        await cache.set(
+            entry_key(req, vary), _StoredResponse(raw, time.time()), duration
+        )
+        # already encoded, don't encode it again
+        return EncodedResponse(raw)
+
+    http_cache_middleware.after = after
+    return http_cache_middleware
@@ -0,0 +1,368 @@
+import asyncio
+import heapq
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, Dict, Iterable, List, Set, Tuple, Union
+
+from ziplineio.cache.base import BaseCache
+from ziplineio.cache.stats import CacheStats
+from ziplineio.response import EncodedResponse, Response
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class _LRUPolicy:
+    """Least-recently-used ordering; every operation is O(1)."""
+
+    def __init__(self) -> None:
+        self._order: OrderedDict[str, None] = OrderedDict()
+
+    def add(self, key: str) -> None:
+        self._order[key] = None
+
+    def touch(self, key: str) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key: str) -> None:
+        self._order.pop(key, None)
+
+    def victim(self) -> str:
+        return next(iter(self._order))
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class _LFUPolicy:
+    """
+    Least-frequently-used ordering using frequency buckets, so every operation
+    is O(1). Ties within a bucket are broken by recency.
+    """
+
+    def __init__(self) -> None:
+        self._freqs: Dict[str, int] = {}
+        self._buckets: Dict[int, OrderedDict[str, None]] = {}
+        self._min_freq = 0
+
+    def add(self, key: str) -> None:
+        self._freqs[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_freq = 1
+
+    def touch(self, key: str) -> None:
+        freq = self._freqs[key]
+        self._unlink(key, freq)
+        self._freqs[key] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+        if self._min_freq == freq and freq not in self._buckets:
+            self._min_freq = freq + 1
+
+    def remove(self, key: str) -> None:
+        freq = self._freqs.pop(key, None)
+        if freq is not None:
+            self._unlink(key, freq)
+
+    def victim(self) -> str:
+        if self._min_freq not in self._buckets:
+            # the least frequent bucket was emptied by a removal
+            self._min_freq = min(self._buckets)
+        return next(iter(self._buckets[self._min_freq]))
+
+    def clear(self) -> None:
+        self._freqs.clear()
+        self._buckets.clear()
+        self._min_freq = 0
+
+    def _unlink(self, key: str, freq: int) -> None:
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+
+
+_EVICTION_POLICIES = {"lru": _LRUPolicy, "lfu": _LFUPolicy}
+
+
+class _TagIndex:
+    """Reverse index from tags to the keys set with them."""
+
+    def __init__(self) -> None:
+        self._keys: Dict[str, Set[str]] = {}
+        self._tags: Dict[str, Tuple[str, ...]] = {}
+
+    def add(self, key: str, tags: Iterable[str]) -> None:
+        self._tags[key] = tuple(tags)
+        for tag in self._tags[key]:
+            self._keys.setdefault(tag, set()).add(key)
+
+    def discard(self, key: str) -> None:
+        for tag in self._tags.pop(key, ()):
+            keys = self._keys[tag]
+            keys.discard(key)
+            if not keys:
+                del self._keys[tag]
+
+    def keys(self, tags: Iterable[str]) -> Set[str]:
+        keys = set()
+        for tag in tags:
+            keys.update(self._keys.get(tag, ()))
+        return keys
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._tags.clear()
+
+
+class _Cleared:
+    """Already-finished awaitable returned by `MemoryCache.clear`."""
+
+    __slots__ = ()
+
+    def __await__(self):
+        return iter(())
+
+
+def _sizeof(value: Any) -> int:
+    """Approximate the memory held by a cached value, in bytes."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, Response):
+        return _sizeof(value.body.bytes()) + _sizeof(value._headers)
+    if isinstance(value, EncodedResponse):
+        return len(value.raw["body"]) + sum(
+            len(name) + len(header) for name, header in value.raw["headers"]
+        )
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _sizeof(k) + _sizeof(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class MemoryCache(BaseCache):
+    """
+    In-process cache with optional bounds.
+
+    `max_entries` and `max_bytes` cap the cache; when either is exceeded,
+    entries are evicted according to `eviction` ("lru" or "lfu"). Expiry uses
+    the monotonic clock. Expired entries are dropped lazily on read and, when
+    `sweep_interval` is set, actively by a background task that removes them
+    in batches of `sweep_batch_size`, yielding to the event loop in between.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        eviction: str = "lru",
+        sweep_interval: Union[int, float, None] = None,
+        sweep_batch_size: int = 1000,
+        sizeof: Callable[[Any], int] = _sizeof,
+    ):
+        if eviction not in _EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+
+        self._cache: Dict[str, _Entry] = {}
+        self._policy = _EVICTION_POLICIES[eviction]()
+        # (expires_at, key) min-heap used by the sweeper; may hold stale items,
+        # and is compacted when they outnumber the live ones
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._sweep_interval = sweep_interval
+        self._sweep_batch_size = sweep_batch_size
+        self._sweeper: asyncio.Task | None = None
+        self._stats = CacheStats()
+        self._tag_index = _TagIndex()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def size(self) -> int:
+        """Approximate number of bytes held by the cache."""
+        return self._bytes
+
+    async def get(self, key: str) -> Any:
+        """Get a cache entry."""
+        entry = self._cache.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+        if time.monotonic() >= entry.expires_at:
+            # remove the expired cache entry
+            self._remove(key)
+            self._stats.misses += 1
+            self._stats.expirations += 1
+            return None
+        self._policy.touch(key)
+        self._stats.hits += 1
+        return entry.value
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        duration: Union[int, float] = 0,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Set a cache entry."""
+        size = self._sizeof(value)
+        if key in self._cache:
+            self._remove(key)
+        if self._max_bytes is not None and size > self._max_bytes:
+            # would evict everything and still not fit
+            return
+
+        # make room before inserting, so a new entry is never its own victim
+        self._evict(size)
+
+        expires_at = time.monotonic() + duration
+        self._cache[key] = _Entry(value, expires_at, size)
+        self._policy.add(key)
+        self._bytes += size
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        # overwritten and removed keys leave stale heap items behind; without
+        # a sweeper, nothing else would drop them
+        if len(self._expiry_heap) > 2 * len(self._cache) + self._sweep_batch_size:
+            self._compact_heap()
+        if tags:
+            self._tag_index.add(key, tags)
+
+        self._ensure_sweeper()
+
+    async def is_expired(self, key: str) -> bool:
+        """Check if a cache entry has expired."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return True
+        return time.monotonic() >= entry.expires_at
+
+    async def delete(self, key: str) -> None:
+        """Delete a cache entry."""
+        if key in self._cache:
+            self._remove(key)
+
+    def clear(self) -> "_Cleared":
+        """
+        Clears the cache. The cache is cleared right away and the returned
+        value can be awaited like the other caches' `clear`, so callers that
+        use it synchronously, as before, keep working.
+        """
+        self._cache.clear()
+        self._policy.clear()
+        self._expiry_heap.clear()
+        self._tag_index.clear()
+        self._bytes = 0
+        return _Cleared()
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Delete every entry set with any of `tags`. Returns how many were deleted."""
+        keys = self._tag_index.keys(tags)
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    async def invalidate_prefix(self, prefix: str) -> int:
+        """Delete every entry whose key starts with `prefix`."""
+        keys = [key for key in self._cache if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    async def stats(self) -> Dict[str, Any]:
+        """Counters (hits, misses, evictions, ...) and current size of the cache."""
+        return {
+            **self._stats.as_dict(),
+            "entries": len(self._cache),
+            "bytes": self._bytes,
+        }
+
+    async def sweep(self) -> int:
+        """
+        Remove expired entries, `sweep_batch_size` at a time, yielding to the
+        event loop between batches. Returns the number of entries removed.
+        """
+        removed = 0
+        heap = self._expiry_heap
+        while True:
+            now = time.monotonic()
+            batch = 0
+            while heap and heap[0][0] <= now and batch < self._sweep_batch_size:
+                expires_at, key = heapq.heappop(heap)
+                batch += 1
+                entry = self._cache.get(key)
+                # skip heap items left behind by overwritten or removed keys
+                if entry is not None and entry.expires_at == expires_at:
+                    self._remove(key)
+                    removed += 1
+                    self._stats.expirations += 1
+
+            if not heap or heap[0][0] > now:
+                break
+            await asyncio.sleep(0)
+
+        if len(heap) > 2 * len(self._cache) + self._sweep_batch_size:
+            self._compact_heap()
+        return removed
+
+    def start_sweeper(self) -> asyncio.Task:
+        """Start the background expiry sweeper on the running event loop."""
+        if self._sweep_interval is None:
+            raise ValueError("`sweep_interval` must be set to run the sweeper")
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+        return self._sweeper
+
+    def stop_sweeper(self) -> None:
+        """Stop the background expiry sweeper, if it is running."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            await self.sweep()
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweep_interval is not None and (
+            self._sweeper is None or self._sweeper.done()
+        ):
+            self.start_sweeper()
+
+    def _evict(self, incoming_size: int) -> None:
+        while self._cache and (
+            (self._max_entries is not None and len(self._cache) >= self._max_entries)
+            or (
+                self._max_bytes is not None
+                and self._bytes + incoming_size > self._max_bytes
+            )
+        ):
+            self._remove(self._policy.victim())
+            self._stats.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._cache.pop(key)
+        self._policy.remove(key)
+        self._tag_index.discard(key)
+        self._bytes -= entry.size
+
+    def _compact_heap(self) -> None:
+        self._expiry_heap = [(e.expires_at, k) for k, e in self._cache.items()]
+        heapq.heapify(self._expiry_heap)
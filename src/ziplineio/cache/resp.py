@@ -0,0 +1,276 @@
+import asyncio
+import pickle
+import re
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Sequence, Union
+
+from ziplineio.cache.base import BaseCache
+from ziplineio.cache.stats import CacheStats
+
+# RESP (REdis Serialization Protocol) client
+# ***
+# Commands are sent as arrays of bulk strings; replies are read in the order
+# the commands were written, so any number of commands can be in flight on
+# one connection (pipelining).
+
+Command = Sequence[Union[str, bytes, int]]
+
+
+class RespError(Exception):
+    """An error reply from the server."""
+
+
+def _encode(command: Command) -> bytes:
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8")
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readuntil(b"\r\n")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        # returned rather than raised, so the next replies can still be read
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Invalid RESP reply: {line!r}")
+
+
+class _Connection:
+    """One connection, with the replies it still owes, in order."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writer = writer
+        self.pending: Deque[asyncio.Future] = deque()
+        self.closed = False
+        self._reader_task = asyncio.get_running_loop().create_task(
+            self._read_replies(reader)
+        )
+
+    async def execute(self, commands: List[Command]) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in commands]
+        # nothing awaits between writing and queueing, so replies line up
+        self._writer.write(b"".join(_encode(command) for command in commands))
+        self.pending.extend(futures)
+        await self._writer.drain()
+        return await asyncio.gather(*futures)
+
+    async def _read_replies(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                reply = await _read_reply(reader)
+                future = self.pending.popleft()
+                if not future.done():
+                    future.set_result(reply)
+        except Exception as e:
+            # a lost connection, or a reply we can't parse: the rest of the
+            # stream can't be trusted, so every pending command fails
+            self.close(ConnectionError(f"Cache connection lost: {e!r}"))
+
+    def close(self, error: Exception | None = None) -> None:
+        self.closed = True
+        self._writer.close()
+        if not self._reader_task.done():
+            self._reader_task.cancel()
+        while self.pending:
+            future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error or ConnectionError("Cache closed"))
+
+
+class RedisCache(BaseCache):
+    """
+    Cache stored on a server speaking the Redis protocol (RESP), shared by
+    every worker of a fleet.
+
+    Up to `pool_size` connections are opened on demand. Commands from
+    concurrent requests are pipelined: they are written to the least busy
+    connection without waiting for earlier replies, and a new connection is
+    only opened when every open one has replies outstanding.
+
+    Keys are prefixed with `namespace`, so `clear` and `invalidate_prefix`
+    only touch this cache's keys. Tags need Redis 7.0 or later (their sets
+    expire with `PEXPIRE ... NX/GT`). Values are serialized with `serializer`
+    (anything with `dumps`/`loads` that round-trips named tuples and
+    `bytes`, `pickle` by default; only use `pickle` with a server that you
+    trust).
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: str | None = None,
+        namespace: str = "ziplineio:",
+        pool_size: int = 10,
+        connect_timeout: Union[int, float] = 5,
+        serializer: Any = pickle,
+    ):
+        if pool_size < 1:
+            raise ValueError("`pool_size` must be at least 1")
+
+        self.host = host
+        self.port = port
+        self._db = db
+        self._password = password
+        self._namespace = namespace
+        self._pool_size = pool_size
+        self._connect_timeout = connect_timeout
+        self._serializer = serializer
+        self._connections: List[_Connection] = []
+        self._connect_lock = asyncio.Lock()
+        self._stats = CacheStats()
+
+    async def get(self, key: str) -> Any:
+        """Get a cache entry."""
+        (data,) = await self.execute(["GET", self._namespace + key])
+        if data is None:
+            self._stats.misses += 1
+            return None
+        self._stats.hits += 1
+        return self._serializer.loads(data)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        duration: Union[int, float] = 0,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Set a cache entry."""
+        key = self._namespace + key
+        milliseconds = int(duration * 1000)
+        if milliseconds <= 0:
+            # already expired
+            await self.execute(["DEL", key])
+            return
+
+        data = self._serializer.dumps(value)
+        commands = [["SET", key, data, "PX", milliseconds]]
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            # A tag's set lives as long as its longest-lived entry: its TTL is
+            # set when it's created (NX), and only ever extended (GT)
+            commands += [
+                ["SADD", tag_key, key],
+                ["PEXPIRE", tag_key, milliseconds, "NX"],
+                ["PEXPIRE", tag_key, milliseconds, "GT"],
+            ]
+        await self.execute(*commands)
+
+    async def delete(self, key: str) -> None:
+        """Delete a cache entry."""
+        await self.execute(["DEL", self._namespace + key])
+
+    async def clear(self) -> None:
+        """Clears every entry under this cache's namespace."""
+        await self._delete_matching(_glob_escape(self._namespace) + "*")
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Delete every entry set with any of `tags`. Returns how many were deleted."""
+        if not tags:
+            return 0
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        members = await self.execute(*[["SMEMBERS", key] for key in tag_keys])
+        keys = set().union(*members)
+
+        commands = [["DEL", *tag_keys]]
+        if keys:
+            commands.insert(0, ["DEL", *keys])
+        deleted, *_ = await self.execute(*commands)
+        return deleted if keys else 0
+
+    async def invalidate_prefix(self, prefix: str) -> int:
+        """Delete every entry whose key starts with `prefix`."""
+        return await self._delete_matching(_glob_escape(self._namespace + prefix) + "*")
+
+    async def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters of this process; expiry happens on the server."""
+        return self._stats.as_dict()
+
+    async def execute(self, *commands: Command) -> List[Any]:
+        """Send commands in one pipeline and return their replies."""
+        conn = await self._connection()
+        replies = await conn.execute(list(commands))
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def close(self) -> None:
+        """Close every connection of the pool."""
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._namespace}\x00tag:{tag}"
+
+    async def _delete_matching(self, pattern: str) -> int:
+        deleted, cursor = 0, b"0"
+        while True:
+            ((cursor, keys),) = await self.execute(
+                ["SCAN", cursor, "MATCH", pattern, "COUNT", 1000]
+            )
+            if keys:
+                (count,) = await self.execute(["DEL", *keys])
+                deleted += count
+            if cursor == b"0":
+                return deleted
+
+    async def _connection(self) -> _Connection:
+        self._connections = [conn for conn in self._connections if not conn.closed]
+        conn = min(self._connections, key=lambda c: len(c.pending), default=None)
+        if conn is not None and (
+            not conn.pending or len(self._connections) >= self._pool_size
+        ):
+            return conn
+
+        async with self._connect_lock:
+            if len(self._connections) < self._pool_size:
+                conn = await self._connect()
+                self._connections.append(conn)
+                return conn
+        return min(self._connections, key=lambda c: len(c.pending))
+
+    async def _connect(self) -> _Connection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self._connect_timeout
+        )
+        conn = _Connection(reader, writer)
+
+        commands = []
+        if self._password is not None:
+            commands.append(["AUTH", self._password])
+        if self._db:
+            commands.append(["SELECT", self._db])
+        if commands:
+            for reply in await conn.execute(commands):
+                if isinstance(reply, RespError):
+                    conn.close()
+                    raise reply
+        return conn
+
+
+def _glob_escape(text: str) -> str:
+    return re.sub(r"([*?\[\]\\])", r"\\\1", text)
@@ -0,0 +1,341 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, Union
+
+from ziplineio.cache.base import BaseCache
+from ziplineio.cache.stats import CacheStats
+
+# File layout
+# ***
+# [ header page                                                ]
+#   magic, version, buckets, ways, slot size, stripes
+#   followed by one byte per lock stripe (locked with fcntl, never written)
+# [ slot 0 ][ slot 1 ] ... [ slot buckets * ways - 1 ]
+#
+# Each slot is `slot_size` bytes:
+#   state (u8), key digest (16 bytes), expires at (f64),
+#   last access (f64), key length (u16), value length (u32),
+#   tag digests (MAX_TAGS x u64, 0 = unused), key bytes, value bytes...
+#
+# Keys and tag digests are kept in the slot so that `invalidate_prefix` and
+# `invalidate_tags` can work on the file alone, from any process.
+#
+# A key hashes to one bucket of `ways` slots; when the bucket is full, its
+# least recently used slot is replaced.
+
+_MAGIC = b"ZLSC"
+_VERSION = 2
+_HEADER = struct.Struct("<4sIIIII")
+_HEADER_SIZE = mmap.PAGESIZE
+_LOCKS_OFFSET = 64
+MAX_TAGS = 4
+_SLOT = struct.Struct(f"<B16sddHI{MAX_TAGS}Q")
+
+_EMPTY = 0
+_USED = 1
+
+
+def _tag_digest(tag: str) -> int:
+    # never 0, which marks an unused tag field
+    digest = hashlib.blake2b(tag.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def _default_path(name: str) -> str:
+    # prefer a memory-backed filesystem when there is one
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, name)
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Cache shared by every process on the host that opens the same file.
+
+    Entries live in a memory-mapped file with a fixed number of slots, so
+    all workers see each other's entries without a network hop. Values are
+    serialized with `serializer` (anything with `dumps`/`loads`, `pickle` by
+    default); values larger than a slot, or with more than `MAX_TAGS` tags,
+    are not cached. Each bucket is guarded by one of `stripes` byte-range
+    locks, so workers only contend when they touch the same stripe.
+
+    The locks are `fcntl` locks, taken without yielding to the event loop: an
+    operation that waits on another process blocks its loop until the lock is
+    released. Single-key operations hold one stripe for a few microseconds,
+    but `clear`, `invalidate_tags`, `invalidate_prefix` and `stats` scan the
+    whole file while holding every stripe, so on a large cache they stall the
+    calling loop and every other worker's cache operations for the scan.
+
+    Expiry uses the wall clock, since it is compared across processes.
+    """
+
+    def __init__(
+        self,
+        name: str = "ziplineio-cache",
+        path: str | None = None,
+        buckets: int = 1024,
+        ways: int = 8,
+        slot_size: int = 4096,
+        stripes: int = 64,
+        serializer: Any = pickle,
+    ):
+        if slot_size <= _SLOT.size:
+            raise ValueError(f"`slot_size` must be larger than {_SLOT.size} bytes")
+        if not 0 < stripes <= _HEADER_SIZE - _LOCKS_OFFSET:
+            raise ValueError("Invalid number of lock stripes")
+
+        self.path = path or _default_path(name)
+        self._buckets = buckets
+        self._ways = ways
+        self._slot_size = slot_size
+        self._stripes = stripes
+        self._serializer = serializer
+        self._capacity = slot_size - _SLOT.size
+        # counters are per process; entries and bytes are read from the file
+        self._stats = CacheStats()
+
+        size = _HEADER_SIZE + buckets * ways * slot_size
+        header = _HEADER.pack(_MAGIC, _VERSION, buckets, ways, slot_size, stripes)
+        while True:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _HEADER_SIZE, 0)
+            try:
+                if self._init_file(header, size):
+                    self._mm = mmap.mmap(self._fd, size)
+                    return
+                # The file has another layout (e.g. left over from a previous
+                # deploy). Replace it rather than resizing it under the feet
+                # of processes that still have it mapped.
+                try:
+                    os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _HEADER_SIZE, 0)
+            os.close(self._fd)
+
+    def _init_file(self, header: bytes, size: int) -> bool:
+        stat = os.fstat(self._fd)
+        if stat.st_nlink == 0:
+            # unlinked by another process while we were waiting on the lock
+            return False
+        if stat.st_size == 0:
+            os.ftruncate(self._fd, size)
+            os.pwrite(self._fd, header, 0)
+            return True
+        return stat.st_size == size and os.pread(self._fd, _HEADER.size, 0) == header
+
+    async def get(self, key: str) -> Any:
+        """Get a cache entry."""
+        digest = self._digest(key)
+        bucket = self._bucket(digest)
+        now = time.time()
+
+        self._lock(bucket)
+        try:
+            offset = self._find(bucket, digest)
+            if offset is None:
+                self._stats.misses += 1
+                return None
+            _, _, expires_at, _, key_len, length, *_ = _SLOT.unpack_from(
+                self._mm, offset
+            )
+            if now >= expires_at:
+                # remove the expired cache entry
+                self._mm[offset] = _EMPTY
+                self._stats.misses += 1
+                self._stats.expirations += 1
+                return None
+            struct.pack_into("<d", self._mm, offset + 25, now)
+            start = offset + _SLOT.size + key_len
+            data = self._mm[start : start + length]
+        finally:
+            self._unlock(bucket)
+
+        self._stats.hits += 1
+        return self._serializer.loads(data)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        duration: Union[int, float] = 0,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Set a cache entry."""
+        digest = self._digest(key)
+        bucket = self._bucket(digest)
+        key_bytes = key.encode("utf-8")
+        data = self._serializer.dumps(value)
+        tag_digests = [_tag_digest(tag) for tag in set(tags)]
+        now = time.time()
+
+        self._lock(bucket)
+        try:
+            offset = self._find(bucket, digest)
+            if (
+                len(key_bytes) + len(data) > self._capacity
+                or len(key_bytes) > 0xFFFF
+                or len(tag_digests) > MAX_TAGS
+            ):
+                # does not fit in a slot; make sure no older value lingers
+                if offset is not None:
+                    self._mm[offset] = _EMPTY
+                return
+            if offset is None:
+                offset = self._victim(bucket, now)
+
+            tag_digests += [0] * (MAX_TAGS - len(tag_digests))
+            _SLOT.pack_into(
+                self._mm,
+                offset,
+                _USED,
+                digest,
+                now + duration,
+                now,
+                len(key_bytes),
+                len(data),
+                *tag_digests,
+            )
+            start = offset + _SLOT.size
+            self._mm[start : start + len(key_bytes)] = key_bytes
+            start += len(key_bytes)
+            self._mm[start : start + len(data)] = data
+        finally:
+            self._unlock(bucket)
+
+    async def delete(self, key: str) -> None:
+        """Delete a cache entry."""
+        digest = self._digest(key)
+        bucket = self._bucket(digest)
+
+        self._lock(bucket)
+        try:
+            offset = self._find(bucket, digest)
+            if offset is not None:
+                self._mm[offset] = _EMPTY
+        finally:
+            self._unlock(bucket)
+
+    async def clear(self) -> None:
+        """Clears the cache, for every process sharing it."""
+        self._lock_all()
+        try:
+            for slot in range(self._buckets * self._ways):
+                self._mm[_HEADER_SIZE + slot * self._slot_size] = _EMPTY
+        finally:
+            self._unlock_all()
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Delete every entry set with any of `tags`. Returns how many were deleted.
+
+        Tags are not indexed across processes, so this scans every slot.
+        """
+        digests = {_tag_digest(tag) for tag in tags}
+        return self._invalidate(lambda offset, fields: bool(digests & set(fields[6:])))
+
+    async def invalidate_prefix(self, prefix: str) -> int:
+        """Delete every entry whose key starts with `prefix`."""
+        prefix_bytes = prefix.encode("utf-8")
+
+        def matches(offset: int, fields: tuple) -> bool:
+            start = offset + _SLOT.size
+            return self._mm[start : start + fields[4]].startswith(prefix_bytes)
+
+        return self._invalidate(matches)
+
+    def _invalidate(self, matches: Callable[[int, tuple], bool]) -> int:
+        deleted = 0
+        self._lock_all()
+        try:
+            for slot in range(self._buckets * self._ways):
+                offset = _HEADER_SIZE + slot * self._slot_size
+                fields = _SLOT.unpack_from(self._mm, offset)
+                if fields[0] == _USED and matches(offset, fields):
+                    self._mm[offset] = _EMPTY
+                    deleted += 1
+        finally:
+            self._unlock_all()
+        return deleted
+
+    async def stats(self) -> Dict[str, Any]:
+        """Counters (hits, misses, evictions, ...) and current size of the cache."""
+        entries, size = 0, 0
+        now = time.time()
+        # other processes write slots concurrently; lock so that no slot is
+        # read half-written
+        self._lock_all()
+        try:
+            for slot in range(self._buckets * self._ways):
+                offset = _HEADER_SIZE + slot * self._slot_size
+                state, _, expires_at, _, _, length, *_ = _SLOT.unpack_from(
+                    self._mm, offset
+                )
+                if state == _USED and now < expires_at:
+                    entries += 1
+                    size += length
+        finally:
+            self._unlock_all()
+        return {**self._stats.as_dict(), "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        """Unmap the cache file. The entries stay available to other processes."""
+        self._mm.close()
+        os.close(self._fd)
+
+    def unlink(self) -> None:
+        """Remove the cache file."""
+        os.unlink(self.path)
+
+    def _digest(self, key: str) -> bytes:
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+    def _bucket(self, digest: bytes) -> int:
+        return int.from_bytes(digest[:8], "little") % self._buckets
+
+    def _lock(self, bucket: int) -> None:
+        stripe = bucket % self._stripes
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, _LOCKS_OFFSET + stripe)
+
+    def _unlock(self, bucket: int) -> None:
+        stripe = bucket % self._stripes
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, _LOCKS_OFFSET + stripe)
+
+    def _lock_all(self) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self._stripes, _LOCKS_OFFSET)
+
+    def _unlock_all(self) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, self._stripes, _LOCKS_OFFSET)
+
+    def _slots(self, bucket: int) -> range:
+        first = _HEADER_SIZE + bucket * self._ways * self._slot_size
+        return range(first, first + self._ways * self._slot_size, self._slot_size)
+
+    def _find(self, bucket: int, digest: bytes) -> int | None:
+        for offset in self._slots(bucket):
+            if (
+                self._mm[offset] == _USED
+                and self._mm[offset + 1 : offset + 17] == digest
+            ):
+                return offset
+        return None
+
+    def _victim(self, bucket: int, now: float) -> int:
+        """Pick the slot to write a new entry to: empty, expired, else LRU."""
+        victim, oldest = None, None
+        for offset in self._slots(bucket):
+            state, _, expires_at, last_access, *_ = _SLOT.unpack_from(self._mm, offset)
+            if state == _EMPTY:
+                return offset
+            if now >= expires_at:
+                self._stats.expirations += 1
+                return offset
+            if oldest is None or last_access < oldest:
+                victim, oldest = offset, last_access
+        self._stats.evictions += 1
+        return victim
@@ -0,0 +1,136 @@
+import bisect
+from typing import Dict, List
+
+from ziplineio.cache.base import get_cache
+from ziplineio.request import Body
+from ziplineio.response import Response
+
+# Upper bounds (seconds) of the load-time histogram buckets
+LOAD_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class CacheStats:
+    """Counters kept by a cache backend."""
+
+    __slots__ = ("hits", "misses", "evictions", "expirations")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Histogram:
+    """Fixed-bucket histogram, in the shape Prometheus expects."""
+
+    def __init__(self, buckets: tuple = LOAD_TIME_BUCKETS) -> None:
+        self.buckets = buckets
+        # one count per bucket, plus one for values above the last bound
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def as_dict(self) -> dict:
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        return {"buckets": cumulative, "sum": self.sum, "count": self.count}
+
+
+class HandlerCacheStats:
+    """Counters kept by the `cache` decorator for one handler."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        # served an expired entry (stale-while-revalidate / stale-if-error)
+        self.stale = 0
+        # missed and called the handler itself, including waiters that gave
+        # up after `lock_timeout`
+        self.misses = 0
+        # missed and got the result of a concurrent request's call instead
+        self.coalesced = 0
+        self.load_time = Histogram()
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "load_time": self.load_time.as_dict(),
+        }
+
+
+# Stats of every handler decorated with `cache`, by qualified handler name
+_handler_stats: Dict[str, HandlerCacheStats] = {}
+
+
+def handler_stats(func_id: str) -> HandlerCacheStats:
+    """Get (or create) the stats of a cached handler."""
+    return _handler_stats.setdefault(func_id, HandlerCacheStats())
+
+
+def get_handler_stats() -> Dict[str, dict]:
+    """Get the stats of every cached handler."""
+    return {func_id: stats.as_dict() for func_id, stats in _handler_stats.items()}
+
+
+def _sample(name: str, value: float, labels: Dict[str, str] = {}) -> str:
+    if labels:
+        label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+        return f"{name}{{{label_str}}} {value}"
+    return f"{name} {value}"
+
+
+def _cache_samples(stats: dict, labels: Dict[str, str]) -> List[str]:
+    lines = []
+    for name, value in stats.items():
+        if isinstance(value, dict):
+            # a tier of a multi-tier cache
+            lines.extend(_cache_samples(value, {**labels, "tier": name}))
+        elif name in ("entries", "bytes"):
+            lines.append(_sample(f"ziplineio_cache_{name}", value, labels))
+        else:
+            lines.append(_sample(f"ziplineio_cache_{name}_total", value, labels))
+    return lines
+
+
+async def render_metrics() -> str:
+    """Render cache and cached-handler stats in the Prometheus text format."""
+    lines = []
+
+    cache = get_cache()
+    if cache is not None:
+        lines.extend(_cache_samples(await cache.stats(), {}))
+
+    name = "ziplineio_cache_handler"
+    for func_id, stats in _handler_stats.items():
+        labels = {"handler": func_id}
+        for counter in ("hits", "stale", "misses", "coalesced"):
+            value = getattr(stats, counter)
+            lines.append(_sample(f"{name}_{counter}_total", value, labels))
+
+        histogram = stats.load_time.as_dict()
+        for bound, count in histogram["buckets"].items():
+            bucket_labels = {**labels, "le": bound}
+            lines.append(_sample(f"{name}_load_seconds_bucket", count, bucket_labels))
+        lines.append(_sample(f"{name}_load_seconds_sum", histogram["sum"], labels))
+        lines.append(_sample(f"{name}_load_seconds_count", histogram["count"], labels))
+
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_handler(req) -> Response:
+    """Handler serving `render_metrics`, e.g. `app.get("/metrics")(metrics_handler)`."""
+    body = Body.from_str(await render_metrics())
+    return Response(200, {"Content-Type": "text/plain; version=0.0.4"}, body)
@@ -2,6 +2,7 @@ import inspect
 from typing import Any, Callable
 from ziplineio.request import Request
 from ziplineio.service import Service, is_service_class
+from ziplineio.timing import phase
 
 
 # Injected services is a dictionary that stores the services that are injected.
@@ -36,7 +37,9 @@ class DependencyInjector:
             )
 
             async def wrapped_handler(req: Request, **kwargs):
-                return await handler(req, **kwargs, **{service_name: instance})
+                with phase("di"):
+                    services = {service_name: instance}
+                return await handler(req, **kwargs, **services)
 
             return wrapped_handler
 
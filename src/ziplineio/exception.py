@@ -1,7 +1,8 @@
 class BaseHttpException(Exception):
-    def __init__(self, message, status_code):
+    def __init__(self, message, status_code, headers=None):
         self.message = message
         self.status_code = status_code
+        self.headers = headers or {}
 
     def __len__(self):
         return 1
@@ -10,3 +11,20 @@ class BaseHttpException(Exception):
 class NotFoundHttpException(BaseHttpException):
     def __init__(self, message="Not found"):
         super().__init__(message, 404)
+
+
+class ServiceUnavailableHttpException(BaseHttpException):
+    def __init__(self, message="Service unavailable", retry_after=None):
+        headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+        super().__init__(message, 503, headers)
+
+
+class GatewayTimeoutHttpException(BaseHttpException):
+    def __init__(self, message="Gateway timeout"):
+        super().__init__(message, 504)
+
+
+class TooManyRequestsHttpException(BaseHttpException):
+    def __init__(self, message="Too many requests", retry_after=None):
+        headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+        super().__init__(message, 429, headers)
@@ -0,0 +1,232 @@
+import asyncio
+import functools
+import inspect
+import os
+from concurrent.futures import Executor as _PoolExecutor
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker
+from typing import Any, Callable, Tuple
+
+from ziplineio import settings
+from ziplineio.exception import ServiceUnavailableHttpException
+from ziplineio.inline import call_inline
+from ziplineio.request import Request
+from ziplineio.shm import SharedMemoryTransport, call_with_shared_memory
+from ziplineio.utils import clean_kwargs
+
+
+class Executor:
+    """Where a route's sync handler runs. Async handlers always run on the loop."""
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        pass
+
+    def start(self) -> None:
+        """Start the workers ahead of the first call, e.g. at app startup."""
+        pass
+
+    def shutdown(self, wait: bool = True) -> None:
+        pass
+
+
+class InlineExecutor(Executor):
+    """
+    Runs sync handlers directly on the event loop. Only for handlers that are
+    so quick that a thread hop costs more than the work itself.
+    """
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        if inspect.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        return call_inline(func, *args, **kwargs)
+
+
+class PoolExecutor(Executor):
+    """
+    Runs sync handlers on a pool of `max_workers` workers, created on first use.
+
+    At most `max_queue` calls wait for a free worker (no limit if `None`, the
+    default); when the queue is full the call fails right away with a 503
+    instead of piling up.
+    """
+
+    def __init__(self, max_workers: int | None = None, max_queue: int | None = None):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.max_queue = max_queue
+        self._pool: _PoolExecutor | None = None
+        # calls submitted to the pool and not finished yet
+        self._pending = 0
+
+    def _create_pool(self) -> _PoolExecutor:
+        pass
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        if inspect.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        return await asyncio.wrap_future(self._submit(func, *args, **kwargs))
+
+    def _submit(self, func: Callable, *args, **kwargs) -> Future:
+        self.start()
+        if (
+            self.max_queue is not None
+            and self._pending >= self.max_workers + self.max_queue
+        ):
+            raise ServiceUnavailableHttpException()
+
+        future = self._pool.submit(func, *args, **kwargs)
+        self._pending += 1
+        # A caller that times out stops waiting, but its call keeps its
+        # worker until it returns: it only leaves the queue then
+        future.add_done_callback(_on_loop(self._call_done))
+        return future
+
+    def _call_done(self) -> None:
+        self._pending -= 1
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = self._create_pool()
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+class ThreadExecutor(PoolExecutor):
+    """Runs sync handlers on a thread pool, e.g. for blocking I/O."""
+
+    def _create_pool(self) -> _PoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="ziplineio-executor"
+        )
+
+
+class DefaultThreadExecutor(ThreadExecutor):
+    """
+    The app's built-in `"thread"` executor. Its queue is bounded by
+    `settings.THREAD_POOL_MAX_QUEUE`, read when the pool starts, so that it
+    can be set after the app is created.
+    """
+
+    def start(self) -> None:
+        if self._pool is None:
+            self.max_queue = settings.THREAD_POOL_MAX_QUEUE
+        super().start()
+
+
+class ProcessExecutor(PoolExecutor):
+    """
+    Runs sync handlers on a process pool, for CPU-bound work. Handlers and
+    their arguments are pickled, so handlers must be module-level functions.
+    `initializer(*initargs)` runs once in each worker process.
+
+    With `shared_memory=True`, `bytes`, `bytearray` and other buffer-protocol
+    arguments and results of at least `shared_memory_threshold` bytes are
+    passed through pooled shared memory blocks instead of being pickled
+    through a pipe. Other buffer types arrive in the worker as a `memoryview`
+    over the block, valid only for the duration of the call. Results only
+    use shared memory from a function's second call on, once the size of its
+    results is known, and when they fit in a block of the previous size.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_queue: int | None = None,
+        initializer: Callable | None = None,
+        initargs: Tuple = (),
+        shared_memory: bool = False,
+        shared_memory_threshold: int = 64 * 1024,
+    ):
+        super().__init__(max_workers or os.cpu_count() or 1, max_queue)
+        self._initializer = initializer
+        self._initargs = initargs
+        self._shared_memory = shared_memory
+        self._shared_memory_threshold = shared_memory_threshold
+        # created with the pool, and closed with it
+        self._transport: SharedMemoryTransport | None = None
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        if inspect.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        self.start()
+        transport = self._transport
+        if transport is None:
+            return await super().run(func, *args, **kwargs)
+
+        call, args, kwargs = transport.prepare(func, args, kwargs)
+        try:
+            future = self._submit(
+                call_with_shared_memory, func, args, kwargs, call.result_ref
+            )
+        except BaseException:
+            call.release()
+            raise
+        try:
+            result = await asyncio.wrap_future(future)
+        except BaseException:
+            # The worker may still be using the blocks, e.g. if the caller
+            # timed out: they go back to the pool once the call is done
+            future.add_done_callback(_on_loop(call.release))
+            raise
+        return transport.finish(func, call, result)
+
+    def _create_pool(self) -> _PoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=self._initializer,
+            initargs=self._initargs,
+        )
+
+    def start(self) -> None:
+        if self._pool is None:
+            if self._shared_memory:
+                self._transport = SharedMemoryTransport(self._shared_memory_threshold)
+                # Workers register the blocks they attach with the resource
+                # tracker: they must share the parent's, which unregisters
+                # them when it unlinks them
+                resource_tracker.ensure_running()
+            super().start()
+            # Worker processes are spawned on demand; spawn them all now, so
+            # that their initializer runs before the first request.
+            for _ in range(self.max_workers):
+                self._pool.submit(_noop)
+
+    def shutdown(self, wait: bool = True) -> None:
+        super().shutdown(wait)
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+
+def _noop() -> None:
+    pass
+
+
+def _on_loop(callback: Callable[[], Any]) -> Callable[[Future], None]:
+    """
+    A done-callback for a pool's future, calling `callback` on the running
+    loop: pool futures complete on the pool's own threads.
+    """
+    loop = asyncio.get_running_loop()
+
+    def done(_: Future) -> None:
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # the loop is closed: nothing else runs on it anymore
+            callback()
+
+    return done
+
+
+def run_on(executor: Executor, handler: Callable) -> Callable:
+    """Wrap a handler so that it is called on `executor`."""
+
+    @functools.wraps(handler)
+    async def wrapper(req: Request = None, **kwargs):
+        kwargs = clean_kwargs({"req": req, **kwargs}, handler)
+        return await executor.run(handler, **kwargs)
+
+    return wrapper
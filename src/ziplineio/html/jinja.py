@@ -3,6 +3,7 @@ from typing import Any
 from httpx import get
 from ziplineio.request_context import get_request
 from ziplineio.response import JinjaResponse
+from ziplineio.timing import phase
 from ziplineio.utils import call_handler
 
 
@@ -13,7 +14,8 @@ def jinja(env: Any, template_name: str):
         async def wrapped_handler(*args, **kwargs):
             req = get_request()
             context = await call_handler(handler, **kwargs, req=req)
-            rendered = template.render(context)
+            with phase("render"):
+                rendered = template.render(context)
             return JinjaResponse(rendered)
 
         return wrapped_handler
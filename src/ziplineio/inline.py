@@ -0,0 +1,44 @@
+import time
+import warnings
+from typing import Any, Callable
+
+from ziplineio import settings
+
+
+def inline(func: Callable) -> Callable:
+    """
+    Mark a sync handler or middleware as cheap enough to run directly on the
+    event loop, instead of on a thread. Only for functions that don't block,
+    e.g. ones that check a header or build a dict.
+    """
+    func._ziplineio_inline = True
+    return func
+
+
+def is_inline(func: Callable) -> bool:
+    """Whether sync `func` runs on the event loop: if marked, or by `settings.INLINE_SYNC`."""
+    return settings.INLINE_SYNC or getattr(func, "_ziplineio_inline", False)
+
+
+def call_inline(func: Callable, *args, **kwargs) -> Any:
+    """
+    Call sync `func` on the event loop. With `settings.INLINE_WARN_AFTER` set,
+    warns when it blocks the loop for longer than that many seconds.
+    """
+    threshold = settings.INLINE_WARN_AFTER
+    if threshold is None:
+        return func(*args, **kwargs)
+
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        if elapsed > threshold:
+            name = getattr(func, "__qualname__", repr(func))
+            warnings.warn(
+                f"Inline function {name} blocked the event loop for "
+                f"{elapsed * 1000:.1f}ms",
+                RuntimeWarning,
+                stacklevel=2,
+            )
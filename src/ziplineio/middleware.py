@@ -1,57 +1,169 @@
-from typing import List, Callable, Tuple
+import asyncio
+import inspect
+from typing import Any, Awaitable, List, Callable, Tuple
 
 from ziplineio.handler import Handler
+from ziplineio.inline import call_inline, is_inline
 from ziplineio.request import Request
 from ziplineio.response import Response
+from ziplineio.timing import _timings_var, phase
 from ziplineio.utils import call_handler
 
 
 def middleware(middlewares: List[Callable]) -> Callable[[Callable], Callable]:
     def decorator(handler: Callable) -> Callable:
-        async def wrapped_handler(req: Request, **kwargs):
-            # Ensure 'ctx' is always present in kwargs
-
-            kwargs.setdefault("ctx", {})
-            # Run the middleware stack
-
-            req, kwargs, res = await run_middleware_stack(
-                middlewares, req=req, **kwargs
-            )
+        chain = MiddlewareChain(middlewares, handler)
 
-            if res is not None:
-                return res
-            else:
-                return await call_handler(handler, req=req, **kwargs)
+        async def wrapped_handler(req: Request, **kwargs):
+            return await chain(req, kwargs)
 
         return wrapped_handler
 
     return decorator
 
 
+def _compile_call(func: Callable) -> Callable[[dict], Awaitable]:
+    """
+    Resolve once how `func` is called: which of the available keyword
+    arguments it takes, and whether it runs on a thread. Like `call_handler`,
+    without looking at the signature on every call.
+    """
+    names = tuple(inspect.signature(func).parameters)
+
+    if inspect.iscoroutinefunction(func):
+        if names == ("req",):
+            return lambda kwargs: func(req=kwargs["req"])
+        if names == ("req", "ctx"):
+            return lambda kwargs: func(req=kwargs["req"], ctx=kwargs["ctx"])
+        return lambda kwargs: func(**{n: kwargs[n] for n in names if n in kwargs})
+
+    async def call(kwargs: dict) -> Any:
+        kwargs = {n: kwargs[n] for n in names if n in kwargs}
+        if is_inline(func):
+            return call_inline(func, **kwargs)
+        return await asyncio.to_thread(func, **kwargs)
+
+    return call
+
+
+class MiddlewareChain:
+    """
+    A middleware stack and its handler, compiled into a flat sequence of
+    calls whose arguments are resolved ahead of time, so that running a
+    stack of N middlewares costs about N calls. Behaves like
+    `run_middleware_stack`, the handler, then `run_after_hooks`, which
+    unmatched requests still go through.
+
+    Middlewares added to the list afterwards (e.g. with `Router.middleware`)
+    are picked up on the next call.
+    """
+
+    def __init__(self, middlewares: List[Callable], handler: Callable):
+        self._middlewares = middlewares
+        self._handler = _compile_call(handler)
+        self._compile()
+
+    def _compile(self) -> None:
+        self._size = len(self._middlewares)
+        self._steps = tuple(_compile_call(m) for m in self._middlewares)
+        self._after_hooks = tuple(
+            _compile_call(m.after)
+            for m in reversed(self._middlewares)
+            if getattr(m, "after", None) is not None
+        )
+
+    async def __call__(self, req: Request, kwargs: dict) -> Any:
+        if len(self._middlewares) != self._size:
+            self._compile()
+
+        ctx = kwargs.setdefault("ctx", {})
+        kwargs["req"] = req
+        timings = _timings_var.get()
+        if timings is not None:
+            timings.start("middleware")
+        try:
+            for step in self._steps:
+                try:
+                    res = await step(kwargs)
+                except Exception as e:
+                    return e
+                # middleware can return the request, or the request and a ctx
+                if isinstance(res, tuple) and len(res) == 2:
+                    res, middleware_ctx = res
+                    ctx.update(middleware_ctx)
+                if not isinstance(res, Request):
+                    return res
+                kwargs["req"] = res
+        finally:
+            if timings is not None:
+                timings.stop()
+
+        try:
+            response = await self._handler(kwargs)
+        except Exception as e:
+            response = e
+
+        if self._after_hooks:
+            if timings is not None:
+                timings.start("after")
+            hook_kwargs = {"req": kwargs["req"], "ctx": ctx}
+            for after in self._after_hooks:
+                hook_kwargs["response"] = response
+                try:
+                    response = await after(hook_kwargs)
+                except Exception as e:
+                    response = e
+            if timings is not None:
+                timings.stop()
+        return response
+
+
 async def run_middleware_stack(
     middlewares: list[Handler], req: Request, **kwargs
 ) -> Tuple[Request, dict, bytes | str | dict | Response | None]:
-    for middleware in middlewares:
-        # if the middleware func takes params, pass them in. Otherwise, just pass req
-
-        if "ctx" not in kwargs:
-            kwargs["ctx"] = {}
+    with phase("middleware"):
+        for middleware in middlewares:
+            # if the middleware func takes params, pass them in. Otherwise, just pass req
 
-        _res = await call_handler(middleware, req=req, **kwargs)
+            if "ctx" not in kwargs:
+                kwargs["ctx"] = {}
 
-        # regular handlers return a response, but middleware can return a tuple
-        if not isinstance(_res, tuple):
-            _res = (_res, kwargs)
+            _res = await call_handler(middleware, req=req, **kwargs)
 
-        if len(_res) != 2:
-            req = _res
-            middleware_ctx = kwargs["ctx"]
-        else:
-            req, middleware_ctx = _res
-            kwargs["ctx"].update(middleware_ctx)
+            # regular handlers return a response, but middleware can return a tuple
+            if not isinstance(_res, tuple):
+                _res = (_res, kwargs)
 
-        if not isinstance(req, Request):
-            response = req
-            return req, kwargs, response
-
-    return req, kwargs, None
+            if len(_res) != 2:
+                req = _res
+            else:
+                req, middleware_ctx = _res
+                if middleware_ctx is not kwargs:
+                    kwargs["ctx"].update(middleware_ctx)
+
+            if not isinstance(req, Request):
+                response = req
+                return req, kwargs, response
+
+        return req, kwargs, None
+
+
+async def run_after_hooks(
+    middlewares: list[Handler], req: Request, response: Any, ctx: dict
+) -> Any:
+    """
+    Middlewares may have an `after` hook, called with the handler's response
+    (innermost middleware first). Whatever it returns replaces the response.
+    Hooks do not run when a middleware short-circuits the handler.
+    """
+    hooks = [
+        middleware.after
+        for middleware in reversed(middlewares)
+        if getattr(middleware, "after", None) is not None
+    ]
+    if not hooks:
+        return response
+    with phase("after"):
+        for after in hooks:
+            response = await call_handler(after, req=req, response=response, ctx=ctx)
+    return response
@@ -1,8 +1,13 @@
 import asyncio
-from concurrent.futures import ProcessPoolExecutor
-
 import functools
+import importlib
 import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Set, Tuple, Union
+
+from ziplineio import settings
+from ziplineio.executor import ProcessExecutor
 
 
 # Define a top-level function to handle the sync function execution
@@ -10,22 +15,92 @@ def execute_sync(func, *args, **kwargs):
     return func(*args, **kwargs)
 
 
-# Ensure the process pool executor is a singleton
-class SyncExecutor:
-    def __init__(self, max_workers=5):
-        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+# Runs once in each worker process, before it takes any work
+def init_worker(
+    preload: Iterable[str], initializer: Callable | None, initargs: Tuple
+) -> None:
+    for module in preload:
+        importlib.import_module(module)
+    if initializer is not None:
+        initializer(*initargs)
 
-    async def run_in_executor(self, func, *args, **kwargs):
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor, functools.partial(execute_sync, func, *args, **kwargs)
+
+# Ensure the process pool executor is a singleton
+class SyncExecutor(ProcessExecutor):
+    """
+    The process pool shared by `run_sync_in_executor` and the `executor=
+    "process"` routes of every app; use `get_instance()`.
+
+    It is sized from `settings.PROCESS_POOL_SIZE` (the number of CPUs by
+    default) and started on first use or at app startup. Each worker imports
+    `settings.PROCESS_POOL_PRELOAD` and calls `settings.PROCESS_POOL_INITIALIZER`
+    when it starts, so heavy modules and state are warm before requests
+    arrive. Settings are read each time the pool starts, and arguments given
+    here take precedence over them. Apps hold it from their lifespan startup
+    to their shutdown, and it shuts down when the last one lets go.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_queue: int | None = None,
+        initializer: Callable | None = None,
+        initargs: Tuple = (),
+        preload: Iterable[str] | None = None,
+        shared_memory: bool | None = None,
+    ):
+        super().__init__(max_workers, max_queue, initializer=init_worker)
+        self._options = (max_workers, max_queue, initializer, initargs, preload)
+        self._shared_memory_option = shared_memory
+        # apps between their lifespan startup and shutdown
+        self._holders = 0
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._configure()
+        super().start()
+
+    def _configure(self) -> None:
+        max_workers, max_queue, initializer, initargs, preload = self._options
+        self.max_workers = (
+            max_workers or settings.PROCESS_POOL_SIZE or os.cpu_count() or 1
+        )
+        self.max_queue = (
+            settings.PROCESS_POOL_MAX_QUEUE if max_queue is None else max_queue
         )
+        if preload is None:
+            preload = settings.PROCESS_POOL_PRELOAD
+        if initializer is None:
+            initializer = settings.PROCESS_POOL_INITIALIZER
+        self._initargs = (tuple(preload), initializer, initargs)
+        self._shared_memory = (
+            settings.PROCESS_POOL_SHARED_MEMORY
+            if self._shared_memory_option is None
+            else self._shared_memory_option
+        )
+
+    def acquire(self) -> None:
+        """Called by an app at lifespan startup."""
+        self._holders += 1
 
-    def shutdown(self):
-        self.executor.shutdown(wait=True)
+    def release(self) -> bool:
+        """
+        Called by an app at lifespan shutdown. Returns whether no app holds
+        the pool anymore, i.e. whether it should shut down.
+        """
+        self._holders = max(0, self._holders - 1)
+        return self._holders == 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        self.start()
+        return self._pool
+
+    async def run_in_executor(self, func, *args, **kwargs):
+        return await self.run(func, *args, **kwargs)
 
     @classmethod
-    def get_instance(cls, max_workers=5):
+    def get_instance(cls, max_workers=None):
         if not hasattr(cls, "_instance"):
             cls._instance = cls(max_workers=max_workers)
         return cls._instance
@@ -33,11 +108,10 @@ class SyncExecutor:
 
 # Factory function to create decorators for running functions in the executor
 def run_sync_in_executor():
-    executor = SyncExecutor()
-
     def decorator(func):
         async def wrapper(*args, **kwargs):
             if not inspect.iscoroutinefunction(func):
+                executor = SyncExecutor.get_instance()
                 return await executor.run_in_executor(func, *args, **kwargs)
             else:
                 return await func(*args, **kwargs)
@@ -47,12 +121,96 @@ def run_sync_in_executor():
     return decorator
 
 
-# # def handle_exit(signum, frame):
-# #     executor_instance = SyncExecutor.get_instance()
-# #     executor_instance.shutdown()
-# #     print("Executor shutdown")
-# #     exit(0)
+class _FunctionRef:
+    """
+    Pickles a function by module and qualified name, and unwraps it in the
+    worker, so that module-level functions decorated in place still work.
+    """
+
+    def __init__(self, func: Callable):
+        self.module = func.__module__
+        self.qualname = func.__qualname__
+
+    def resolve(self) -> Callable:
+        func = importlib.import_module(self.module)
+        for name in self.qualname.split("."):
+            func = getattr(func, name)
+        return inspect.unwrap(func)
+
+
+def run_batch(func: Callable | _FunctionRef, calls: List[Tuple[tuple, dict]]) -> list:
+    """Run `func` over a batch of calls, in a worker. Errors are returned per call."""
+    if isinstance(func, _FunctionRef):
+        func = func.resolve()
+    results = []
+    for args, kwargs in calls:
+        try:
+            results.append((True, func(*args, **kwargs)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+def batched(
+    max_batch: int = 64,
+    max_wait_ms: Union[int, float] = 2,
+    executor: ProcessExecutor | None = None,
+):
+    """
+    Run a sync function on the process pool, grouping concurrent calls into
+    one submission: calls are collected until `max_batch` of them are waiting
+    or `max_wait_ms` has passed since the first, then the worker runs the
+    function over the whole batch and each caller gets its own result (or
+    exception) back. For cheap functions, where the round trip to the pool
+    costs more than the work itself.
+    """
+
+    def decorator(func):
+        # a module-level function is resolved by name in the worker
+        target = func if "<locals>" in func.__qualname__ else _FunctionRef(func)
+        pending: List[Tuple[tuple, dict, asyncio.Future]] = []
+        timer: List[asyncio.TimerHandle] = []
+
+        async def submit(batch):
+            pool = executor if executor is not None else SyncExecutor.get_instance()
+            calls = [(args, kwargs) for args, kwargs, _ in batch]
+            try:
+                results = await pool.run(run_batch, target, calls)
+            except Exception as e:
+                results = [(False, e)] * len(batch)
+
+            for (_, _, future), (ok, value) in zip(batch, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+        def flush():
+            if timer:
+                timer.pop().cancel()
+            batch = pending[:]
+            pending.clear()
+            task = asyncio.get_running_loop().create_task(submit(batch))
+            _batches.add(task)
+            task.add_done_callback(_batches.discard)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            pending.append((args, kwargs, future))
+            if len(pending) >= max_batch:
+                flush()
+            elif len(pending) == 1:
+                timer.append(loop.call_later(max_wait_ms / 1000, flush))
+            return await future
+
+        return wrapper
+
+    return decorator
 
 
-# # signal.signal(signal.SIGINT, handle_exit)
-# # signal.signal(signal.SIGTERM, handle_exit)
+# Strong references to the batches in flight, so they aren't garbage collected
+_batches: Set[asyncio.Task] = set()
@@ -0,0 +1,158 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Union
+
+from ziplineio.cache.base import BaseCache
+from ziplineio.exception import TooManyRequestsHttpException
+from ziplineio.request import Request
+
+# Rate limiting
+# ***
+# Token buckets are stored as a single timestamp per key, the "theoretical
+# arrival time" (GCRA): the time at which the bucket would be full again.
+# Refills are computed lazily from it when a request comes in, and a key
+# whose timestamp has passed has a full bucket, so it can be dropped.
+
+
+def _take(
+    tat: float | None, now: float, interval: float, window: float, cost: int
+) -> tuple[float, float]:
+    """Returns the new arrival time, and how long to wait (0 if allowed)."""
+    new_tat = (now if tat is None else max(tat, now)) + cost * interval
+    wait = new_tat - now - window
+    # tolerate rounding errors from adding up intervals
+    return new_tat, wait if wait > 1e-9 else 0.0
+
+
+class RateLimitBackend:
+    """Where the buckets are kept."""
+
+    async def take(self, key: str, interval: float, window: float, cost: int) -> float:
+        """
+        Take `cost` tokens from the bucket at `key`, refilled one token per
+        `interval` seconds, holding at most `window / interval` tokens. Returns
+        0 if they were taken, or how many seconds to wait before retrying.
+        """
+        pass
+
+
+class MemoryBuckets(RateLimitBackend):
+    """
+    Buckets in this process, one float per active key. Keys whose bucket has
+    refilled are evicted as requests come in, and at most `max_keys` are kept
+    (the least recently used are evicted first).
+    """
+
+    def __init__(self, max_keys: int | None = 1_000_000):
+        self._max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    async def take(self, key: str, interval: float, window: float, cost: int) -> float:
+        now = time.monotonic()
+        self._evict(now)
+
+        new_tat, wait = _take(self._tats.get(key), now, interval, window, cost)
+        if wait:
+            return wait
+        self._tats[key] = new_tat
+        self._tats.move_to_end(key)
+        if self._max_keys is not None and len(self._tats) > self._max_keys:
+            self._tats.popitem(last=False)
+        return 0.0
+
+    def _evict(self, now: float, limit: int = 2) -> None:
+        # A few refilled keys at a time, oldest first, so each call stays O(1)
+        for _ in range(limit):
+            if not self._tats:
+                return
+            key, tat = next(iter(self._tats.items()))
+            if tat > now:
+                return
+            del self._tats[key]
+
+
+class CacheBuckets(RateLimitBackend):
+    """
+    Buckets in a cache, e.g. a `SharedMemoryCache` to share them between
+    workers, or a `RedisCache` between hosts. Entries expire once their
+    bucket has refilled. Timestamps are wall-clock time, so hosts' clocks
+    must be in sync.
+
+    Reading and updating a bucket isn't atomic across workers: concurrent
+    requests from the same key may occasionally all get through.
+    """
+
+    def __init__(self, cache: BaseCache, prefix: str = "ratelimit:"):
+        self._cache = cache
+        self._prefix = prefix
+
+    async def take(self, key: str, interval: float, window: float, cost: int) -> float:
+        key = self._prefix + key
+        now = time.time()
+        new_tat, wait = _take(await self._cache.get(key), now, interval, window, cost)
+        if wait:
+            return wait
+        await self._cache.set(key, new_tat, new_tat - now)
+        return 0.0
+
+
+# Key functions: which bucket a request takes from. Requests for which the
+# key is `None` are not limited.
+
+
+def client_ip(req: Request) -> str | None:
+    client = getattr(req, "client", None)
+    return client[0] if client else None
+
+
+def header(name: str) -> Callable[[Request], str | None]:
+    name = name.lower()
+
+    def key(req: Request) -> str | None:
+        for header_name, value in req.headers.items():
+            if header_name.lower() == name:
+                return value
+        return None
+
+    return key
+
+
+def path_param(name: str) -> Callable[[Request], str | None]:
+    def key(req: Request) -> str | None:
+        return req.path_params.get(name)
+
+    return key
+
+
+def rate_limit(
+    rate: Union[int, float],
+    per: float = 1.0,
+    burst: int | None = None,
+    key: Callable[[Request], str | None] = client_ip,
+    backend: RateLimitBackend | None = None,
+    cost: int = 1,
+) -> Callable:
+    """
+    A middleware allowing `rate` requests every `per` seconds for each key
+    (the client's IP by default), with bursts of up to `burst` requests
+    (`rate` by default). Requests over the limit get a 429 with a
+    `Retry-After` header.
+    """
+    interval = per / rate
+    window = (burst or rate) * interval
+    backend = backend if backend is not None else MemoryBuckets()
+
+    async def rate_limit_middleware(req: Request):
+        bucket = key(req)
+        if bucket is None:
+            return req
+        wait = await backend.take(bucket, interval, window, cost)
+        if wait:
+            return TooManyRequestsHttpException(retry_after=math.ceil(wait))
+        return req
+
+    return rate_limit_middleware
@@ -1,6 +1,6 @@
 from calendar import c
 import json
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class Body:
@@ -43,6 +43,7 @@ class Request:
         path_params: Dict[str, str] = {},
         headers: Dict[str, str] = {},
         body: Body = Body(b""),
+        client: Tuple[str, int] | None = None,
     ):
         self.method = method
         self.path = path
@@ -50,6 +51,8 @@ class Request:
         self.query_params = query_params
         self.headers = headers
         self.body = body
+        # (host, port) of the client, when the server knows it
+        self.client = client
 
     method: str
     path: str
@@ -57,3 +60,4 @@ class Request:
     path_params: Dict[str, str]
     headers: Dict[str, str]
     body: Body
+    client: Tuple[str, int] | None
@@ -1,8 +1,11 @@
+import time
 from contextvars import ContextVar
 
 from ziplineio.request import Request
 
 _request_context_var = ContextVar("request_context")
+# monotonic time by which the current request must be answered
+_deadline_var: ContextVar[float | None] = ContextVar("deadline", default=None)
 
 
 def set_request(request: Request):
@@ -11,3 +14,19 @@ def set_request(request: Request):
 
 def get_request() -> Request:
     return _request_context_var.get()
+
+
+def get_deadline() -> float | None:
+    """The `time.monotonic()` deadline of the current request, if it has a timeout."""
+    return _deadline_var.get()
+
+
+def remaining_time() -> float | None:
+    """
+    Seconds left before the current request times out, or `None` if it has no
+    timeout. Use it to bound calls to downstream services.
+    """
+    deadline = _deadline_var.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
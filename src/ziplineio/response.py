@@ -12,6 +12,20 @@ class RawResponse(TypedDict):
     body: bytes
 
 
+class EncodedResponse:
+    """
+    A response that has already been encoded for the wire, default headers
+    included. `format_response` passes it through untouched.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: RawResponse):
+        self.raw = raw
+
+    raw: RawResponse
+
+
 class Response:
     def __init__(self, status: int, headers: Dict[str, str], body: Body):
         self.status = status
@@ -87,6 +101,10 @@ def format_response(
 ) -> RawResponse:
     # Helper to merge and deduplicate headers
 
+    # Already encoded (e.g. served from the cache)
+    if isinstance(response, EncodedResponse):
+        return response.raw
+
     # Format different response types
     if isinstance(response, bytes):
         headers = [(b"content-type", b"text/plain")]
@@ -110,6 +128,7 @@ def format_response(
 
     elif isinstance(response, BaseHttpException):
         headers = [(b"content-type", b"application/json")]
+        headers += format_headers(response.headers)
         body = format_body(response.message)
         status = response.status_code
 
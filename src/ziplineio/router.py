@@ -6,6 +6,8 @@ from typing import Any, Callable, Dict, List, Union
 from ziplineio.dependency_injector import DependencyInjector, inject, injector
 from ziplineio.handler import Handler
 from ziplineio.middleware import middleware
+from ziplineio.static import staticfiles
+from ziplineio.timeout import with_timeout
 
 
 class Router:
@@ -25,6 +27,8 @@ class Router:
         self._sub_routers = {}
         self._prefix = prefix.rstrip("/")
         self._injector = injector
+        # instances injected through this router, set up at lifespan startup
+        self._services: List[Any] = []
 
     def middleware(self, middlewares: List[Handler]) -> None:
         self._router_level_middelwares.extend(middlewares)
@@ -32,15 +36,25 @@ class Router:
     def inject(self, service_class: Any, name: str = None) -> None:
         if isinstance(service_class, list):
             for service in service_class:
-                self._injector.add_injected_service(service, name, self._id)
+                self.inject(service, name)
             return None
-        self._injector.add_injected_service(service_class, name, self._id)
+        instance, _ = self._injector.add_injected_service(service_class, name, self._id)
+        self._services.append(instance)
+
+    def _all_services(self) -> List[Any]:
+        """Instances injected through this router and its sub-routers."""
+        services = list(self._services)
+        for sub_router in self._sub_routers.values():
+            services.extend(sub_router._all_services())
+        return services
 
     def _convert_path_to_regex(self, path: str) -> str:
         # Convert a path like '/user/:id' to a regex pattern like '/user/(?P<id>[^/]+)'
         return re.sub(r":(\w+)", r"(?P<\1>[^/]+)", path) + "$"
 
-    def route(self, method: str, path: str) -> Callable[[Callable], Callable]:
+    def route(
+        self, method: str, path: str, timeout: float | None = None
+    ) -> Callable[[Callable], Callable]:
         def decorator(handler: Callable) -> Callable:
             # inject router-level dependencies into the handler
             services = injector.get_injected_services(self._id)
@@ -61,6 +75,10 @@ class Router:
             if len(self._router_level_middelwares) > 0:
                 handler = middleware(self._router_level_middelwares)(handler)
 
+            # the timeout covers the middlewares too
+            if timeout is not None:
+                handler = with_timeout(handler, timeout)
+
             # Convert the path into a regex pattern
             path_regex = self._convert_path_to_regex(self._prefix + path)
             self._handlers[method][path_regex] = handler
@@ -68,17 +86,32 @@ class Router:
 
         return decorator
 
-    def get(self, path: str) -> Callable[[Callable], Callable]:
-        return self.route("GET", path)
-
-    def post(self, path: str) -> Callable[[Callable], Callable]:
-        return self.route("POST", path)
-
-    def put(self, path: str) -> Callable[[Callable], Callable]:
-        return self.route("PUT", path)
-
-    def delete(self, path: str) -> Callable[[Callable], Callable]:
-        return self.route("DELETE", path)
+    def get(
+        self, path: str, timeout: float | None = None
+    ) -> Callable[[Callable], Callable]:
+        return self.route("GET", path, timeout)
+
+    def post(
+        self, path: str, timeout: float | None = None
+    ) -> Callable[[Callable], Callable]:
+        return self.route("POST", path, timeout)
+
+    def put(
+        self, path: str, timeout: float | None = None
+    ) -> Callable[[Callable], Callable]:
+        return self.route("PUT", path, timeout)
+
+    def delete(
+        self, path: str, timeout: float | None = None
+    ) -> Callable[[Callable], Callable]:
+        return self.route("DELETE", path, timeout)
+
+    def static(self, filepath: str, path_prefix: str = "/static") -> None:
+        # Static mounts are plain prefix routes: they are not wrapped with
+        # router-level middlewares, and other routes never see them.
+        prefix = re.escape(self._prefix + path_prefix.rstrip("/"))
+        path_regex = prefix + r"/(?P<filepath>.+)$"
+        self._handlers["GET"][path_regex] = staticfiles(filepath)
 
     def not_found(self, handler: Handler) -> None:
         self._not_found_handler = handler
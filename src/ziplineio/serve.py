@@ -0,0 +1,194 @@
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Any, Dict, List
+
+import uvicorn
+
+from ziplineio.app import App
+
+# A worker that dies sooner than this after starting is restarted after a
+# delay, so that a crash at import or startup doesn't spin the master.
+MIN_WORKER_LIFETIME = 1.0
+RESTART_DELAY = 1.0
+
+
+def import_app(target: str) -> Any:
+    """Import an app given as `module:attribute`, e.g. `myapp.main:app`."""
+    module_name, _, attribute = target.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Expected `module:attribute`, got {target!r}")
+
+    obj = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def bind_socket(
+    host: str,
+    port: int,
+    reuse_port: bool = False,
+    backlog: int = 2048,
+    listen: bool = True,
+) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    if listen:
+        sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Master:
+    """
+    Prefork server: the app is imported once, in the master, then `workers`
+    processes are forked to serve it, sharing its memory copy-on-write.
+
+    Workers either all accept on the master's listening socket, or, with
+    `reuse_port`, each bind their own `SO_REUSEPORT` socket and let the
+    kernel balance connections between them. Workers that exit are
+    restarted until the master receives SIGINT or SIGTERM, which it passes
+    on to the workers before waiting for them to finish.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: int | None = None,
+        reuse_port: bool = False,
+        backlog: int = 2048,
+        log_level: str = "info",
+    ):
+        # build the ASGI callable once, before forking
+        self.app = app() if isinstance(app, App) else app
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.reuse_port = reuse_port
+        self.backlog = backlog
+        self.log_level = log_level
+        self.socket: socket.socket | None = None
+        # pid -> (worker slot, start time)
+        self._children: Dict[int, tuple] = {}
+        self._stopping = False
+
+    def run(self) -> None:
+        # With SO_REUSEPORT the master still binds, so that the port is
+        # reserved (and errors surface) before any worker starts, but doesn't
+        # listen: the kernel would hand it connections nobody accepts.
+        self.socket = bind_socket(
+            self.host,
+            self.port,
+            self.reuse_port,
+            self.backlog,
+            listen=not self.reuse_port,
+        )
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        # Keep the objects created at import time out of the workers' garbage
+        # collections, so collecting doesn't unshare their pages.
+        gc.collect()
+        gc.freeze()
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        while self._children:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            slot, started_at = self._children.pop(pid, (None, 0))
+            if slot is None or self._stopping:
+                continue
+            if time.monotonic() - started_at < MIN_WORKER_LIFETIME:
+                time.sleep(RESTART_DELAY)
+            if not self._stopping:
+                self._spawn(slot)
+
+        self.socket.close()
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # worker: never return into the master's loop
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                self._serve()
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self._children[pid] = (slot, time.monotonic())
+
+    def _serve(self) -> None:
+        if self.reuse_port:
+            self.socket.close()
+            sock = bind_socket(self.host, self.port, True, self.backlog)
+        else:
+            sock = self.socket
+
+        config = uvicorn.Config(self.app, lifespan="auto", log_level=self.log_level)
+        uvicorn.Server(config).run(sockets=[sock])
+
+    def _stop(self, signum: int, frame: Any) -> None:
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="ziplineio")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Serve an app with forked workers")
+    serve.add_argument("app", help="the app to serve, as `module:attribute`")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument(
+        "--workers", type=int, default=None, help="defaults to the number of CPUs"
+    )
+    serve.add_argument(
+        "--reuse-port",
+        action="store_true",
+        help="give each worker its own SO_REUSEPORT socket",
+    )
+    serve.add_argument("--backlog", type=int, default=2048)
+    serve.add_argument("--log-level", default="info")
+
+    args = parser.parse_args(argv)
+    # make `module:app` importable from the current directory
+    sys.path.insert(0, os.getcwd())
+    Master(
+        import_app(args.app),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reuse_port=args.reuse_port,
+        backlog=args.backlog,
+        log_level=args.log_level,
+    ).run()
@@ -1,5 +1,11 @@
 class Service:
-    pass
+    async def setup(self) -> None:
+        """Called once at app startup, e.g. to open connection pools."""
+        pass
+
+    async def teardown(self) -> None:
+        """Called once at app shutdown, in reverse order of setup."""
+        pass
 
 
 def is_service_class(service_class):
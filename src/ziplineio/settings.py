@@ -1 +1,39 @@
 DEFAULT_HEADERS = {"x-powered-by": "zipline"}
+
+# Seconds after which a handler is cancelled and a 504 returned, for routes
+# without their own `timeout=`; no timeout if None
+REQUEST_TIMEOUT = None
+
+# Run every sync handler and middleware directly on the event loop, as if
+# marked with `@inline`, instead of on a thread
+INLINE_SYNC = False
+# Warn when an inline function blocks the event loop for longer than this
+# many seconds; not checked if None
+INLINE_WARN_AFTER = None
+
+# Time the phases of each request (parse, route, middleware, di, handler,
+# render, after, serialize) and send them in a `Server-Timing` header
+SERVER_TIMING = False
+SERVER_TIMING_HEADER = True
+# Called with the request and its `Timings` once the response is sent, e.g.
+# to export them as metrics
+SERVER_TIMING_SINK = None
+
+# Requests whose background tasks may run at the same time
+BACKGROUND_TASKS_MAX_CONCURRENCY = 100
+# Requests whose background tasks wait for their turn, past which they are
+# dropped with a warning; no limit if None
+BACKGROUND_TASKS_MAX_PENDING = 10_000
+
+# Calls waiting for a worker of the app's built-in "thread" executor, past
+# which its routes get a 503; no limit if None
+THREAD_POOL_MAX_QUEUE = None
+
+# Process pool shared by `run_sync_in_executor` and `executor="process"` routes
+PROCESS_POOL_SIZE = None  # defaults to the number of CPUs
+PROCESS_POOL_MAX_QUEUE = None  # calls waiting for a worker; no limit if None
+PROCESS_POOL_PRELOAD = []  # modules each worker imports when it starts
+PROCESS_POOL_INITIALIZER = (
+    None  # module-level function each worker calls when it starts
+)
+PROCESS_POOL_SHARED_MEMORY = False  # pass large buffers through shared memory
@@ -0,0 +1,226 @@
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+# Shared-memory transport for process pools
+# ***
+# Large `bytes`, `bytearray` and other buffer-protocol arguments and results
+# are copied into shared memory blocks, and only a `_SharedRef` handle goes
+# through the pool's pipe. The parent owns every block: it allocates them
+# from a pool, including one for the result when it expects a large one,
+# and reuses them once the call is done.
+
+
+class _SharedRef(NamedTuple):
+    name: str
+    nbytes: int
+    # "bytes", "bytearray" or "memoryview"
+    kind: str
+    format: str = "B"
+    shape: Tuple[int, ...] = ()
+
+
+def _buffer(value: Any) -> memoryview | None:
+    """A contiguous view of `value`, if it supports the buffer protocol."""
+    if isinstance(value, (str, int, float)) or value is None:
+        return None
+    try:
+        view = memoryview(value)
+    except TypeError:
+        return None
+    return view if view.c_contiguous else None
+
+
+def _kind(value: Any) -> str:
+    if isinstance(value, bytes):
+        return "bytes"
+    if isinstance(value, bytearray):
+        return "bytearray"
+    return "memoryview"
+
+
+def _write(block: shared_memory.SharedMemory, value: Any, view: memoryview):
+    block.buf[: view.nbytes] = view.cast("B")
+    return _SharedRef(
+        block.name, view.nbytes, _kind(value), view.format, tuple(view.shape)
+    )
+
+
+def _read(buf: memoryview, ref: _SharedRef, copy: bool = False) -> Any:
+    data = buf[: ref.nbytes]
+    if ref.kind == "bytes":
+        return bytes(data)
+    if ref.kind == "bytearray":
+        return bytearray(data)
+    if copy:
+        # the block is about to be reused
+        data = memoryview(bytearray(data))
+    try:
+        return data.cast(ref.format, ref.shape)
+    except (TypeError, ValueError):
+        return data
+
+
+class SharedMemoryPool:
+    """
+    Shared memory blocks, reused across calls. Sizes are rounded up to a
+    power of two (at least `min_size`), and at most `max_free` blocks of
+    each size are kept for reuse.
+    """
+
+    def __init__(self, min_size: int = 64 * 1024, max_free: int = 8):
+        self._min_size = min_size
+        self._max_free = max_free
+        self._free: Dict[int, List[shared_memory.SharedMemory]] = {}
+        self._closed = False
+
+    def acquire(self, nbytes: int) -> shared_memory.SharedMemory:
+        size = max(self._min_size, 1 << (nbytes - 1).bit_length())
+        free = self._free.get(size)
+        if free:
+            return free.pop()
+        return shared_memory.SharedMemory(create=True, size=size)
+
+    def release(self, block: shared_memory.SharedMemory) -> None:
+        if self._closed:
+            # e.g. a call that was still running when the pool closed
+            _destroy(block)
+            return
+        free = self._free.setdefault(block.size, [])
+        if len(free) < self._max_free:
+            free.append(block)
+        else:
+            _destroy(block)
+
+    def close(self) -> None:
+        self._closed = True
+        for free in self._free.values():
+            for block in free:
+                _destroy(block)
+        self._free.clear()
+
+
+def _destroy(block: shared_memory.SharedMemory) -> None:
+    block.close()
+    block.unlink()
+
+
+class SharedMemoryCall:
+    """The arguments of one call, with large buffers moved to shared memory."""
+
+    def __init__(self, pool: SharedMemoryPool, threshold: int, result_size: int):
+        self._pool = pool
+        self._threshold = threshold
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.result_ref: _SharedRef | None = None
+        if result_size:
+            self._result_block = self._acquire(result_size)
+            self.result_ref = _SharedRef(
+                self._result_block.name, self._result_block.size, "result"
+            )
+
+    def _acquire(self, nbytes: int) -> shared_memory.SharedMemory:
+        block = self._pool.acquire(nbytes)
+        self.blocks.append(block)
+        return block
+
+    def share(self, value: Any) -> Any:
+        view = _buffer(value)
+        if view is None or view.nbytes < self._threshold:
+            return value
+        return _write(self._acquire(view.nbytes), value, view)
+
+    def load_result(self, result: Any) -> Any:
+        if isinstance(result, _SharedRef):
+            return _read(self._result_block.buf, result, copy=True)
+        return result
+
+    def release(self) -> None:
+        for block in self.blocks:
+            self._pool.release(block)
+        self.blocks = []
+
+
+class SharedMemoryTransport:
+    """
+    Parent side of the transport: moves the large arguments of a call to
+    shared memory, and remembers how large each function's results are, so
+    the next call can hand it a block to write its result to. A function's
+    first large result thus still goes through the pipe, as do results that
+    outgrow the block sized after the previous one.
+    """
+
+    def __init__(self, threshold: int = 64 * 1024, pool: SharedMemoryPool = None):
+        self.threshold = threshold
+        self.pool = pool if pool is not None else SharedMemoryPool()
+        self._result_sizes: Dict[Callable, int] = {}
+
+    def prepare(self, func: Callable, args: Tuple, kwargs: dict):
+        call = SharedMemoryCall(
+            self.pool, self.threshold, self._result_sizes.get(func, 0)
+        )
+        args = tuple(call.share(arg) for arg in args)
+        kwargs = {name: call.share(value) for name, value in kwargs.items()}
+        return call, args, kwargs
+
+    def finish(self, func: Callable, call: SharedMemoryCall, result: Any) -> Any:
+        try:
+            result = call.load_result(result)
+        finally:
+            call.release()
+
+        view = _buffer(result)
+        if view is not None and view.nbytes >= self.threshold:
+            self._result_sizes[func] = view.nbytes
+        else:
+            self._result_sizes.pop(func, None)
+        return result
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+# Worker side
+# ***
+
+# Blocks are reused by the parent, so workers keep the most recently used
+# ones attached
+_MAX_ATTACHED = 64
+_attached: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if name in _attached:
+        _attached.move_to_end(name)
+        return _attached[name]
+
+    _attached[name] = shared_memory.SharedMemory(name=name)
+    while len(_attached) > _MAX_ATTACHED:
+        _, block = _attached.popitem(last=False)
+        try:
+            block.close()
+        except BufferError:
+            # still referenced by a view the function kept
+            pass
+    return _attached[name]
+
+
+def _load(value: Any) -> Any:
+    if isinstance(value, _SharedRef):
+        return _read(_attach(value.name).buf, value)
+    return value
+
+
+def call_with_shared_memory(
+    func: Callable, args: Tuple, kwargs: dict, result_ref: _SharedRef | None
+) -> Any:
+    """Run `func` in a worker, reading and writing large buffers in shared memory."""
+    args = [_load(arg) for arg in args]
+    kwargs = {name: _load(value) for name, value in kwargs.items()}
+    result = func(*args, **kwargs)
+
+    view = _buffer(result)
+    if result_ref is not None and view is not None and view.nbytes <= result_ref.nbytes:
+        return _write(_attach(result_ref.name), result, view)
+    # no block for it, or it doesn't fit: goes through the pipe
+    return result
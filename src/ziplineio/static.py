@@ -1,5 +1,6 @@
 from os import path
 
+from ziplineio.exception import NotFoundHttpException
 from ziplineio.response import StaticFileResponse
 
 
@@ -13,17 +14,21 @@ def _get_headers(filename: str) -> dict[str, str]:
     return {"Content-Type": "text/plain"}
 
 
-def staticfiles(filepath: str, path_prefix: str):
-    async def handler(req, ctx):
-        if req.path.startswith(path_prefix):
-            # remove path prefix
-            _filepath = path.join(filepath, req.path[len(path_prefix) :])
-            # add filepath
-            _filepath = filepath + _filepath
-            # get full path
-            _filepath = path.abspath(_filepath)
-            headers = _get_headers(_filepath)
-            return StaticFileResponse(_filepath, headers)
-        return req, ctx
+def staticfiles(filepath: str):
+    """
+    Build the handler for a static mount. The router registers it as a prefix
+    route, so it only ever sees requests under the mount and receives the
+    remainder of the path as the `filepath` path param.
+    """
+    root = path.abspath(filepath)
+
+    async def handler(req):
+        # get full path, refusing anything that resolves outside the mount
+        _filepath = path.abspath(path.join(root, req.path_params.get("filepath", "")))
+        if not _filepath.startswith(root + path.sep) or not path.isfile(_filepath):
+            return NotFoundHttpException()
+
+        headers = _get_headers(_filepath)
+        return StaticFileResponse(_filepath, headers)
 
     return handler
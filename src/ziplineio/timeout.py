@@ -0,0 +1,45 @@
+import asyncio
+import time
+from typing import Any, Callable
+
+from ziplineio.exception import GatewayTimeoutHttpException
+from ziplineio.request import Request
+from ziplineio.request_context import _deadline_var
+from ziplineio.utils import call_handler
+
+
+async def call_with_timeout(
+    handler: Callable, timeout: float, req: Request, **kwargs
+) -> Any:
+    """
+    Call `handler`, cancelling it and returning a 504 once `timeout` seconds
+    have passed. The deadline is set on the request context, for
+    `remaining_time()`; an enclosing, earlier deadline is kept.
+
+    A sync handler running on a thread can't be interrupted: its response is
+    dropped, but the thread runs until the handler returns.
+    """
+    deadline = time.monotonic() + timeout
+    outer = _deadline_var.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+
+    token = _deadline_var.set(deadline)
+    try:
+        return await asyncio.wait_for(
+            call_handler(handler, req=req, **kwargs), deadline - time.monotonic()
+        )
+    except asyncio.TimeoutError:
+        return GatewayTimeoutHttpException()
+    finally:
+        _deadline_var.reset(token)
+
+
+def with_timeout(handler: Callable, timeout: float) -> Callable:
+    """Wrap a route's handler so that it times out after `timeout` seconds."""
+
+    async def wrapper(req: Request, **kwargs):
+        return await call_with_timeout(handler, timeout, req, **kwargs)
+
+    wrapper._timeout = timeout
+    return wrapper
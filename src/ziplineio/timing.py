@@ -0,0 +1,80 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, List
+
+# The phase timings of the current request, when `settings.SERVER_TIMING` is on
+_timings_var: ContextVar["Timings | None"] = ContextVar("timings", default=None)
+
+
+class Timings:
+    """
+    Time spent in each phase of a request (parse, route, middleware, di,
+    handler, render, after, serialize). Phases can nest: time is counted
+    towards the innermost phase only, so the durations add up.
+    """
+
+    __slots__ = ("durations", "started", "total", "_stack")
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        # seconds from the start of the request to its response
+        self.total: float | None = None
+        # [name, time it (re)started] of the phases in progress
+        self._stack: List[list] = []
+
+    def start(self, name: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            self._add(*self._stack[-1], now)
+        self._stack.append([name, now])
+
+    def stop(self) -> None:
+        now = time.perf_counter()
+        self._add(*self._stack.pop(), now)
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def _add(self, name: str, start: float, now: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + now - start
+
+    def finish(self) -> None:
+        self.total = time.perf_counter() - self.started
+
+    def header(self) -> str:
+        """The `Server-Timing` header value, in milliseconds."""
+        metrics = [
+            f"{name};dur={duration * 1000:.3f}"
+            for name, duration in self.durations.items()
+        ]
+        if self.total is not None:
+            metrics.append(f"total;dur={self.total * 1000:.3f}")
+        return ", ".join(metrics)
+
+
+def get_timings() -> Timings | None:
+    return _timings_var.get()
+
+
+class phase:
+    """
+    Time a block as a phase of the current request, e.g.
+    `with phase("db"): ...`. Does nothing when timing is off.
+    """
+
+    __slots__ = ("name", "timings")
+
+    def __init__(self, name: str):
+        self.name = name
+        timings = _timings_var.get()
+        # Tasks spawned during a request inherit its timings: once it has
+        # finished, they must not record on its stack anymore
+        self.timings = timings if timings is None or timings.total is None else None
+
+    def __enter__(self) -> None:
+        if self.timings is not None:
+            self.timings.start(self.name)
+
+    def __exit__(self, *exc_info) -> None:
+        if self.timings is not None:
+            self.timings.stop()
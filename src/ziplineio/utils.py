@@ -8,6 +8,7 @@ from typing import Dict
 from ziplineio.request import Body, Request
 from ziplineio.response import Response
 from ziplineio.handler import Handler
+from ziplineio.inline import call_inline, is_inline
 from ziplineio.models import ASGIScope
 
 
@@ -41,10 +42,12 @@ async def call_handler(
 ) -> bytes | str | dict | Response | Exception:
     try:
         kwargs = clean_kwargs(kwargs, handler)
-        if not inspect.iscoroutinefunction(handler):
-            response = await asyncio.to_thread(handler, **kwargs)
-        else:
+        if inspect.iscoroutinefunction(handler):
             response = await handler(**kwargs)
+        elif is_inline(handler):
+            response = call_inline(handler, **kwargs)
+        else:
+            response = await asyncio.to_thread(handler, **kwargs)
 
     except Exception as e:
         response = e
@@ -76,6 +79,7 @@ async def parse_scope(scope: ASGIScope, receive: callable) -> Request:
         path_params=path_params,
         headers=headers,
         body=body,
+        client=scope.get("client"),
     )
 
 
@@ -0,0 +1,157 @@
+import asyncio
+import fnmatch
+import time
+from typing import Dict, List, Set
+
+
+class RespServer:
+    """
+    Small in-process stand-in for a Redis server, speaking just enough RESP
+    for `RedisCache`: PING, AUTH, SELECT, GET, SET (PX/EX), DEL, SADD,
+    SMEMBERS, PEXPIRE (NX/GT) and SCAN.
+    """
+
+    def __init__(self, password: str | None = None):
+        self.password = password
+        self.data: Dict[bytes, bytes | Set[bytes]] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.connections = 0
+        # most commands read from a single packet, i.e. pipelined
+        self.max_pipeline = 0
+        self._server: asyncio.AbstractServer | None = None
+        self._clients: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        for writer in self._clients.values():
+            writer.close()
+        await asyncio.gather(*self._clients)
+        await self._server.wait_closed()
+
+    async def _serve(self, reader, writer) -> None:
+        self.connections += 1
+        self._clients[asyncio.current_task()] = writer
+        authed = self.password is None
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    return
+                buffer += data
+                commands, buffer = _parse(buffer)
+                self.max_pipeline = max(self.max_pipeline, len(commands))
+
+                replies = []
+                for command in commands:
+                    name = command[0].upper()
+                    if name == b"AUTH":
+                        authed = command[1].decode() == self.password
+                        replies.append(b"+OK\r\n" if authed else b"-WRONGPASS\r\n")
+                    elif not authed:
+                        replies.append(b"-NOAUTH Authentication required.\r\n")
+                    else:
+                        replies.append(self._execute(name, command[1:]))
+                writer.write(b"".join(replies))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _alive(self, key: bytes) -> bool:
+        if key in self.expires and time.time() >= self.expires[key]:
+            del self.data[key], self.expires[key]
+        return key in self.data
+
+    def _execute(self, name: bytes, args: List[bytes]) -> bytes:
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name == b"SELECT":
+            return b"+OK\r\n"
+        if name == b"GET":
+            if not self._alive(args[0]):
+                return b"$-1\r\n"
+            return _bulk(self.data[args[0]])
+        if name == b"SET":
+            key, value = args[0], args[1]
+            self.data[key] = value
+            self.expires.pop(key, None)
+            if len(args) == 4:
+                scale = 1000 if args[2].upper() == b"PX" else 1
+                self.expires[key] = time.time() + int(args[3]) / scale
+            return b"+OK\r\n"
+        if name == b"DEL":
+            deleted = 0
+            for key in args:
+                if self._alive(key):
+                    del self.data[key]
+                    self.expires.pop(key, None)
+                    deleted += 1
+            return b":%d\r\n" % deleted
+        if name == b"SADD":
+            self._alive(args[0])
+            members = self.data.setdefault(args[0], set())
+            added = len(set(args[1:]) - members)
+            members.update(args[1:])
+            return b":%d\r\n" % added
+        if name == b"SMEMBERS":
+            members = self.data[args[0]] if self._alive(args[0]) else set()
+            return b"*%d\r\n" % len(members) + b"".join(map(_bulk, members))
+        if name == b"PEXPIRE":
+            key, expires_at = args[0], time.time() + int(args[1]) / 1000
+            flag = args[2].upper() if len(args) > 2 else None
+            if not self._alive(key):
+                return b":0\r\n"
+            # keys without a TTL never expire: GT never shortens them to one
+            current = self.expires.get(key)
+            if (flag == b"NX" and current is not None) or (
+                flag == b"GT" and (current is None or expires_at <= current)
+            ):
+                return b":0\r\n"
+            self.expires[key] = expires_at
+            return b":1\r\n"
+        if name == b"SCAN":
+            # everything in one page
+            pattern = (
+                args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+            )
+            keys = [
+                key
+                for key in list(self.data)
+                if self._alive(key) and fnmatch.fnmatchcase(key.decode(), pattern)
+            ]
+            page = b"*%d\r\n" % len(keys) + b"".join(map(_bulk, keys))
+            return b"*2\r\n" + _bulk(b"0") + page
+        return b"-ERR unknown command '%s'\r\n" % name
+
+
+def _bulk(value: bytes) -> bytes:
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _parse(buffer: bytes):
+    """Split complete commands off the buffer."""
+    commands = []
+    while buffer:
+        pos = 0
+        try:
+            end = buffer.index(b"\r\n", pos)
+            count = int(buffer[1:end])
+            pos = end + 2
+            command = []
+            for _ in range(count):
+                end = buffer.index(b"\r\n", pos)
+                length = int(buffer[pos + 1 : end])
+                start = end + 2
+                if len(buffer) < start + length + 2:
+                    raise ValueError("incomplete")
+                command.append(buffer[start : start + length])
+                pos = start + length + 2
+        except ValueError:
+            break
+        commands.append(command)
+        buffer = buffer[pos:]
+    return commands, buffer
@@ -0,0 +1,10 @@
+import os
+
+from ziplineio.app import App
+
+app = App()
+
+
+@app.get("/pid")
+async def pid():
+    return {"pid": os.getpid()}
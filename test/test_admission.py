@@ -0,0 +1,151 @@
+import asyncio
+import unittest
+
+from ziplineio.admission import AdmissionController
+from ziplineio.app import App
+from ziplineio.response import format_response
+
+
+class TestAdmissionController(unittest.IsolatedAsyncioTestCase):
+    async def test_queued_request_gets_the_freed_slot(self):
+        controller = AdmissionController(max_concurrency=1)
+        self.assertTrue(await controller.acquire())
+
+        waiting = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        self.assertFalse(waiting.done())
+
+        controller.release()
+        self.assertTrue(await waiting)
+        self.assertEqual(controller.in_flight, 1)
+
+        controller.release()
+        self.assertEqual(controller.in_flight, 0)
+
+    async def test_shed_after_waiting_too_long(self):
+        controller = AdmissionController(max_concurrency=1, interval=0.02)
+        await controller.acquire()
+
+        self.assertFalse(await controller.acquire())
+        self.assertEqual(controller.shed, 1)
+
+        rejection = format_response(controller.rejection(), {})
+        self.assertEqual(rejection["status"], 503)
+        self.assertIn((b"Retry-After", b"1"), rejection["headers"])
+
+        # the shed request left the queue
+        controller.release()
+        self.assertEqual(controller.in_flight, 0)
+
+    async def test_full_queue_sheds_right_away(self):
+        controller = AdmissionController(max_concurrency=1, max_queue=0)
+        await controller.acquire()
+        self.assertFalse(await controller.acquire())
+
+    async def test_priorities(self):
+        controller = AdmissionController(max_concurrency=1)
+        await controller.acquire()
+
+        order = []
+
+        async def request(priority):
+            await controller.acquire(priority)
+            order.append(priority)
+
+        tasks = [asyncio.create_task(request(p)) for p in ("low", "normal", "high")]
+        await asyncio.sleep(0)
+        # critical requests are never queued
+        self.assertTrue(await controller.acquire("critical"))
+
+        for _ in tasks:
+            controller.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(order, ["high", "normal", "low"])
+
+    async def test_standing_queue_shortens_waits(self):
+        controller = AdmissionController(
+            max_concurrency=1, target_delay=0.001, interval=0.05
+        )
+        await controller.acquire()
+
+        # every request waits longer than the target for a whole interval
+        for _ in range(10):
+            if controller.overloaded:
+                break
+            waiting = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0.03)
+            controller.release()
+            await waiting
+        self.assertTrue(controller.overloaded)
+
+        self.assertFalse(await controller.acquire("low"))
+        waiting = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+        self.assertTrue(waiting.done())
+        self.assertFalse(waiting.result())
+
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        controller = AdmissionController(max_concurrency=1)
+        await controller.acquire()
+
+        waiting = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+
+        controller.release()
+        self.assertEqual(controller.in_flight, 0)
+
+
+class TestAppAdmission(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+
+    async def asgi_get(self, path):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+        }
+        messages = []
+
+        async def receive():
+            return {"body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app()(scope, receive, send)
+        return messages
+
+    async def test_requests_over_the_limit_are_shed(self):
+        self.app.admission(AdmissionController(max_concurrency=1, max_queue=0))
+        release = asyncio.Event()
+
+        @self.app.get("/slow")
+        async def slow():
+            await release.wait()
+            return "done"
+
+        @self.app.get("/health", priority="critical")
+        async def health():
+            return "ok"
+
+        first = asyncio.create_task(self.asgi_get("/slow"))
+        await asyncio.sleep(0)
+
+        shed = await self.asgi_get("/slow")
+        self.assertEqual(shed[0]["status"], 503)
+        self.assertIn((b"Retry-After", b"1"), shed[0]["headers"])
+
+        health_check = await self.asgi_get("/health")
+        self.assertEqual(health_check[1]["body"], b"ok")
+
+        release.set()
+        self.assertEqual((await first)[1]["body"], b"done")
+        self.assertEqual(self.app._admission.in_flight, 0)
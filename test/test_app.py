@@ -5,6 +5,7 @@ from ziplineio.dependency_injector import DependencyInjector, inject
 from ziplineio.request import Request
 from ziplineio.app import App, Router
 from ziplineio.middleware import middleware
+from ziplineio.service import Service
 
 
 class LoggingService:
@@ -173,6 +174,96 @@ class TestApp(unittest.IsolatedAsyncioTestCase):
         # Assertions
         self.assertEqual(response["message"], "User 123 received")
 
+    async def lifespan(self, *messages):
+        messages = iter([{"type": f"lifespan.{m}"} for m in messages])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await self.app()({"type": "lifespan"}, receive, send)
+        return sent
+
+    async def test_lifespan_hooks_and_services(self):
+        events = []
+
+        class Pool(Service):
+            async def setup(self):
+                events.append("pool setup")
+
+            async def teardown(self):
+                events.append("pool teardown")
+
+        class Repository(Service):
+            def __init__(self, pool: Pool):
+                self.pool = pool
+
+            def setup(self):
+                events.append("repository setup")
+
+        self.app.inject([Pool, Repository])
+
+        @self.app.on_startup
+        async def warm_cache():
+            events.append("startup")
+
+        @self.app.on_shutdown
+        def close():
+            events.append("shutdown")
+
+        sent = await self.lifespan("startup", "shutdown")
+
+        self.assertEqual(
+            sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        )
+        self.assertEqual(
+            events,
+            [
+                "pool setup",
+                "repository setup",
+                "startup",
+                "shutdown",
+                "pool teardown",
+            ],
+        )
+
+    async def test_lifespan_only_sets_up_this_apps_services(self):
+        set_up = []
+
+        class Tracked(Service):
+            def setup(self):
+                set_up.append(self.label)
+
+        def tracked(label):
+            return type(label, (Tracked,), {"label": label})
+
+        users = Router()
+        users.inject(tracked("users"))
+        admin = Router()
+        admin.inject(tracked("admin"))
+        users.add_sub_router("/admin", admin)
+        self.app.inject(tracked("app"))
+        self.app.router("/users", users)
+
+        App().inject(tracked("other app"))
+        Router().inject(tracked("unmounted router"))
+
+        await self.lifespan("startup", "shutdown")
+
+        self.assertEqual(set_up, ["app", "users", "admin"])
+
+    async def test_failed_startup_hook(self):
+        @self.app.on_startup
+        async def fail():
+            raise RuntimeError("database unreachable")
+
+        sent = await self.lifespan("startup")
+
+        self.assertEqual(sent, ["lifespan.startup.failed"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+import ziplineio
+from ziplineio.app import App
+from ziplineio.background import BackgroundTaskRunner, BackgroundTasks
+from ziplineio.dependency_injector import DependencyInjector
+
+
+class TestBackgroundTasks(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+        ziplineio.dependency_injector.injector = DependencyInjector()
+        self.app._injector = ziplineio.dependency_injector.injector
+        self.app.inject(BackgroundTasks)
+
+    async def asgi_get(self, path, events):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+        }
+
+        async def receive():
+            return {"body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                events.append("response sent")
+
+        await self.app()(scope, receive, send)
+
+    async def test_tasks_run_after_the_response(self):
+        events = []
+        sent_webhook = asyncio.Event()
+
+        async def send_webhook(order_id):
+            events.append(f"webhook {order_id}")
+            sent_webhook.set()
+
+        def audit(order_id, user=None):
+            events.append(
+                f"audit {order_id} by {user} on {threading.current_thread().name}"
+            )
+
+        @self.app.get("/order/:id")
+        async def order(req, background_tasks: BackgroundTasks):
+            background_tasks.add(audit, req.path_params["id"], user="ada")
+            background_tasks.add(send_webhook, req.path_params["id"])
+            events.append("handled")
+            return "ok"
+
+        await self.asgi_get("/order/1", events)
+        await asyncio.wait_for(sent_webhook.wait(), 1)
+
+        self.assertEqual(events[:2], ["handled", "response sent"])
+        self.assertTrue(events[2].startswith("audit 1 by ada"))
+        # on the app's thread executor
+        self.assertIn("ziplineio-executor", events[2])
+        self.assertEqual(events[3], "webhook 1")
+
+    async def test_failing_task_does_not_stop_the_others(self):
+        events = []
+
+        def fail():
+            raise ValueError("webhook down")
+
+        @self.app.get("/")
+        async def index(req, background_tasks: BackgroundTasks):
+            background_tasks.add(fail)
+            background_tasks.add(events.append, "after failure")
+            return "ok"
+
+        with patch("traceback.print_exc") as print_exc:
+            await self.asgi_get("/", events)
+            await self.app._background.join()
+
+        print_exc.assert_called_once()
+        self.assertEqual(events, ["response sent", "after failure"])
+
+    async def test_tasks_are_dropped_when_the_response_is_not_sent(self):
+        events = []
+
+        @self.app.get("/")
+        async def index(req, background_tasks: BackgroundTasks):
+            background_tasks.add(events.append, "task")
+            return "ok"
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "query_string": b"",
+            "headers": [],
+        }
+
+        async def receive():
+            return {"body": b"", "more_body": False}
+
+        async def send(message):
+            raise ConnectionResetError()
+
+        with self.assertRaises(ConnectionResetError):
+            await self.app()(scope, receive, send)
+        await self.app._background.join()
+
+        self.assertEqual(events, [])
+
+    async def test_shutdown_waits_for_tasks(self):
+        events = []
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            events.append("task done")
+
+        @self.app.get("/")
+        async def index(req, background_tasks: BackgroundTasks):
+            background_tasks.add(slow)
+            return "ok"
+
+        await self.asgi_get("/", events)
+        await self.app.shutdown()
+
+        self.assertEqual(events, ["response sent", "task done"])
+
+    async def test_concurrency_is_bounded(self):
+        runner = BackgroundTaskRunner(max_concurrency=2)
+        running = 0
+        peak = 0
+
+        async def task():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        for _ in range(5):
+            token = runner.collect()
+            BackgroundTasks().add(task)
+            runner.schedule(token)
+        await runner.join()
+
+        self.assertEqual(peak, 2)
+
+    async def test_pending_tasks_are_bounded(self):
+        runner = BackgroundTaskRunner(max_concurrency=1, max_pending=2)
+        ran = []
+
+        async def task(i):
+            await asyncio.sleep(0.01)
+            ran.append(i)
+
+        def schedule(i):
+            token = runner.collect()
+            BackgroundTasks().add(task, i)
+            runner.schedule(token)
+
+        schedule(0)
+        await asyncio.sleep(0)
+        with self.assertWarns(RuntimeWarning):
+            for i in range(1, 5):
+                schedule(i)
+        await runner.join()
+
+        # one running, two pending
+        self.assertEqual(ran, [0, 1, 2])
+        self.assertEqual(runner.dropped, 2)
+
+    def test_add_outside_a_request(self):
+        with self.assertRaises(RuntimeError):
+            BackgroundTasks().add(print)
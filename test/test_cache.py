@@ -1,9 +1,34 @@
-import unittest
+import asyncio
+import json
+import multiprocessing
+import os
 import random
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
 from ziplineio.app import App
-from ziplineio.cache import MemoryCache, set_cache, cache
+from ziplineio.cache import (
+    CacheKey,
+    DiskCache,
+    MemoryCache,
+    RedisCache,
+    RespError,
+    SharedMemoryCache,
+    TieredCache,
+    cache,
+    get_cache,
+    get_handler_stats,
+    http_cache,
+    metrics_handler,
+    set_cache,
+)
 from ziplineio.dependency_injector import inject
-from ziplineio.request import Request
+from ziplineio.exception import NotFoundHttpException, ServiceUnavailableHttpException
+from ziplineio.request import Body, Request
+from ziplineio.response import EncodedResponse, Response, format_response
+
+from test.mocks.resp_server import RespServer
 
 
 class TestMemoryCache(unittest.IsolatedAsyncioTestCase):
@@ -25,13 +50,24 @@ class TestMemoryCache(unittest.IsolatedAsyncioTestCase):
         # Ensure the result is cached
         self.assertEqual(first_call, second_call)
 
+    async def test_clear_works_without_await(self):
+        memory_cache = MemoryCache()
+        await memory_cache.set("a", 1, 60)
+
+        memory_cache.clear()
+        self.assertIsNone(await memory_cache.get("a"))
+
+        await memory_cache.set("a", 1, 60)
+        await memory_cache.clear()
+        self.assertIsNone(await memory_cache.get("a"))
+
     async def test_handler_cache_with_dep_injector(self):
         class Service:
-            def speak():
+            def speak(self):
                 return "Hello"
 
         @self.app.get("/cached_number")
-        @inject(Service)
+        @inject(Service, name="s")
         @cache(5)
         async def handler(s: Service):
             return s.speak() + str(random.randint(0, 9999))
@@ -43,3 +79,962 @@ class TestMemoryCache(unittest.IsolatedAsyncioTestCase):
 
         # Ensure the result is cached
         self.assertEqual(first_call, second_call)
+
+
+class TestBoundedMemoryCache(unittest.IsolatedAsyncioTestCase):
+    async def test_lru_eviction_by_entries(self):
+        c = MemoryCache(max_entries=2)
+        await c.set("a", 1, 60)
+        await c.set("b", 2, 60)
+        await c.get("a")
+        await c.set("c", 3, 60)
+
+        self.assertEqual(await c.get("a"), 1)
+        self.assertIsNone(await c.get("b"))
+        self.assertEqual(await c.get("c"), 3)
+
+    async def test_lfu_eviction(self):
+        c = MemoryCache(max_entries=2, eviction="lfu")
+        await c.set("a", 1, 60)
+        await c.set("b", 2, 60)
+        await c.get("a")
+        await c.get("a")
+        await c.get("b")
+        await c.set("c", 3, 60)
+
+        self.assertEqual(await c.get("a"), 1)
+        self.assertIsNone(await c.get("b"))
+
+    async def test_eviction_by_bytes(self):
+        c = MemoryCache(max_bytes=10)
+        await c.set("a", b"12345", 60)
+        await c.set("b", b"12345", 60)
+        await c.set("c", b"123", 60)
+
+        self.assertIsNone(await c.get("a"))
+        self.assertEqual(await c.get("c"), b"123")
+        self.assertEqual(c.size, 8)
+
+        # values larger than the whole budget are not stored
+        await c.set("d", b"x" * 11, 60)
+        self.assertIsNone(await c.get("d"))
+
+    async def test_eviction_by_bytes_of_encoded_responses(self):
+        c = MemoryCache(max_bytes=1000)
+        raw = {"status": 200, "headers": [(b"a", b"b")], "body": b"x" * 600}
+        await c.set("a", EncodedResponse(raw), 60)
+        self.assertEqual(c.size, 602)
+
+        await c.set("b", EncodedResponse(raw), 60)
+        self.assertIsNone(await c.get("a"))
+        self.assertEqual(c.size, 602)
+
+    async def test_sweep_removes_unread_expired_entries(self):
+        c = MemoryCache(sweep_batch_size=2)
+        for i in range(5):
+            await c.set(f"expired-{i}", i, 0)
+        await c.set("fresh", "value", 60)
+
+        removed = await c.sweep()
+
+        self.assertEqual(removed, 5)
+        self.assertEqual(len(c), 1)
+        self.assertEqual(await c.get("fresh"), "value")
+
+    async def test_expiry_heap_stays_bounded_without_sweeper(self):
+        c = MemoryCache(max_entries=10, sweep_batch_size=100)
+        for i in range(100_000):
+            await c.set(f"key-{i % 20}", i, 60)
+
+        self.assertEqual(len(c), 10)
+        self.assertLessEqual(len(c._expiry_heap), 2 * 10 + 100 + 1)
+
+    async def test_background_sweeper(self):
+        c = MemoryCache(sweep_interval=0.01)
+        await c.set("a", 1, 0)
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(c), 0)
+        c.stop_sweeper()
+
+
+class TestCacheSingleFlight(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+        set_cache(MemoryCache())
+
+    async def test_concurrent_misses_share_one_call(self):
+        calls = 0
+
+        @self.app.get("/slow")
+        @cache(5)
+        async def handler(req):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"calls": calls}
+
+        results = await asyncio.gather(
+            *[
+                self.app._get_and_call_handler("GET", "/slow", Request("GET", "/slow"))
+                for _ in range(10)
+            ]
+        )
+
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(r == {"calls": 1} for r in results))
+
+    async def test_errors_propagate_to_waiters_and_are_not_cached(self):
+        calls = 0
+
+        @self.app.get("/fails")
+        @cache(5)
+        async def handler():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *[
+                self.app._get_and_call_handler(
+                    "GET", "/fails", Request("GET", "/fails")
+                )
+                for _ in range(3)
+            ]
+        )
+
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+        await self.app._get_and_call_handler("GET", "/fails", Request("GET", "/fails"))
+        self.assertEqual(calls, 2)
+
+    async def test_lock_timeout(self):
+        calls = 0
+
+        @self.app.get("/slow")
+        @cache(5, lock_timeout=0.01)
+        async def handler():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return calls
+
+        await asyncio.gather(
+            *[
+                self.app._get_and_call_handler("GET", "/slow", Request("GET", "/slow"))
+                for _ in range(3)
+            ]
+        )
+
+        self.assertEqual(calls, 3)
+
+
+class TestCacheStaleModes(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+        set_cache(MemoryCache())
+
+    async def call(self, path):
+        return await self.app._get_and_call_handler("GET", path, Request("GET", path))
+
+    async def test_stale_while_revalidate(self):
+        calls = 0
+
+        @self.app.get("/swr")
+        @cache(0.01, stale_while_revalidate=5)
+        async def handler():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        self.assertEqual(await self.call("/swr"), 1)
+        await asyncio.sleep(0.02)
+
+        # the stale value is served right away, and refreshed in the background
+        self.assertEqual(await self.call("/swr"), 1)
+        await asyncio.sleep(0.005)
+        self.assertEqual(calls, 2)
+        self.assertEqual(await self.call("/swr"), 2)
+
+    async def test_stale_if_error(self):
+        calls = 0
+
+        @self.app.get("/sie")
+        @cache(0.01, stale_if_error=5)
+        async def handler():
+            nonlocal calls
+            calls += 1
+            if calls > 1:
+                raise ValueError("downstream failed")
+            return "good"
+
+        self.assertEqual(await self.call("/sie"), "good")
+        await asyncio.sleep(0.02)
+
+        self.assertEqual(await self.call("/sie"), "good")
+        self.assertEqual(calls, 2)
+
+    async def test_stale_if_error_serves_stale_on_5xx(self):
+        calls = 0
+
+        @self.app.get("/sie-5xx")
+        @cache(0.01, stale_if_error=5)
+        async def handler():
+            nonlocal calls
+            calls += 1
+            if calls > 1:
+                raise ServiceUnavailableHttpException()
+            return "good"
+
+        self.assertEqual(await self.call("/sie-5xx"), "good")
+        await asyncio.sleep(0.02)
+
+        self.assertEqual(await self.call("/sie-5xx"), "good")
+
+    async def test_stale_if_error_returns_expected_http_errors(self):
+        calls = 0
+
+        @self.app.get("/sie-404")
+        @cache(0.01, stale_if_error=5)
+        async def handler():
+            nonlocal calls
+            calls += 1
+            if calls > 1:
+                raise NotFoundHttpException()
+            return "good"
+
+        self.assertEqual(await self.call("/sie-404"), "good")
+        await asyncio.sleep(0.02)
+
+        self.assertIsInstance(await self.call("/sie-404"), NotFoundHttpException)
+
+    async def test_errors_returned_without_stale_value(self):
+        @self.app.get("/fails")
+        @cache(0.01, stale_if_error=5)
+        async def handler():
+            raise ValueError("downstream failed")
+
+        self.assertIsInstance(await self.call("/fails"), ValueError)
+
+
+class TestCacheKeys(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+        set_cache(MemoryCache())
+
+    async def call(self, path, query_params={}, headers={}):
+        req = Request("GET", path, query_params=query_params, headers=headers)
+        return await self.app._get_and_call_handler("GET", path, req)
+
+    async def test_query_param_order_does_not_matter(self):
+        @self.app.get("/search")
+        @cache(5)
+        async def handler():
+            return random.randint(0, 9999)
+
+        first = await self.call("/search", {"a": "1", "b": "2"})
+        second = await self.call("/search", {"b": "2", "a": "1"})
+        third = await self.call("/search", {"a": "1", "b": "3"})
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(get_cache()), 2)
+        self.assertNotEqual(first, third)
+
+    async def test_vary_on_headers(self):
+        @self.app.get("/greeting")
+        @cache(5, key=CacheKey(query=False, headers=["Accept-Language"]))
+        async def handler(req):
+            return req.headers.get("accept-language")
+
+        self.assertEqual(
+            await self.call("/greeting", headers={"accept-language": "en"}), "en"
+        )
+        self.assertEqual(
+            await self.call("/greeting", headers={"accept-language": "fr"}), "fr"
+        )
+        self.assertEqual(
+            await self.call("/greeting", {"ignored": "1"}, {"accept-language": "en"}),
+            "en",
+        )
+        self.assertEqual(len(get_cache()), 2)
+
+    async def test_custom_key_callable(self):
+        @self.app.get("/tenant")
+        @cache(5, key=lambda req: req.headers.get("x-tenant"))
+        async def handler():
+            return random.randint(0, 9999)
+
+        first = await self.call("/tenant", {"a": "1"}, {"x-tenant": "acme"})
+        second = await self.call("/tenant", {"a": "2"}, {"x-tenant": "acme"})
+
+        self.assertEqual(first, second)
+
+    async def test_handlers_with_the_same_name_do_not_collide(self):
+        def reader():
+            @cache(5)
+            async def handler():
+                return "read"
+
+            return handler
+
+        def writer():
+            @cache(5)
+            async def handler():
+                return "written"
+
+            return handler
+
+        self.app.get("/item")(reader())
+        self.app.post("/item")(writer())
+
+        req = Request("POST", "/item")
+        self.assertEqual(await self.call("/item"), "read")
+        self.assertEqual(
+            await self.app._get_and_call_handler("POST", "/item", req), "written"
+        )
+
+    async def test_keys_are_the_path_and_a_fixed_size_digest(self):
+        @self.app.get("/search")
+        @cache(5)
+        async def handler():
+            return "ok"
+
+        await self.call("/search", {"q": "x" * 1000})
+        key = next(iter(get_cache()._cache))
+
+        self.assertEqual(len(key), len("/search#") + 32)
+
+
+def _write_from_another_process(path):
+    async def write():
+        c = SharedMemoryCache(path=path, buckets=1, ways=2, slot_size=256)
+        await c.set("from-child", {"pid": os.getpid()}, 60)
+        c.close()
+
+    asyncio.run(write())
+
+
+class TestCacheInvalidation(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+        set_cache(MemoryCache())
+
+    async def call(self, path):
+        req = Request("GET", path)
+        return await self.app._get_and_call_handler("GET", path, req)
+
+    async def test_invalidate_tags_from_path_params(self):
+        @self.app.get("/user/:id")
+        @cache(60, tags=["user:{id}", "users"])
+        async def handler(req):
+            return random.randint(0, 9999)
+
+        first_1 = await self.call("/user/1")
+        first_2 = await self.call("/user/2")
+
+        self.assertEqual(await get_cache().invalidate_tags("user:1"), 1)
+        self.assertNotEqual(await self.call("/user/1"), first_1)
+        self.assertEqual(await self.call("/user/2"), first_2)
+
+        self.assertEqual(await get_cache().invalidate_tags("users"), 2)
+        self.assertEqual(len(get_cache()), 0)
+
+    async def test_callable_tags(self):
+        @self.app.get("/team")
+        @cache(60, tags=[lambda req: f"tenant:{req.headers.get('x-tenant')}"])
+        async def handler():
+            return random.randint(0, 9999)
+
+        req = Request("GET", "/team", headers={"x-tenant": "acme"})
+        first = await self.app._get_and_call_handler("GET", "/team", req)
+
+        self.assertEqual(await get_cache().invalidate_tags("tenant:acme"), 1)
+        second = await self.app._get_and_call_handler("GET", "/team", req)
+        self.assertNotEqual(first, second)
+
+    async def test_invalidate_prefix(self):
+        @self.app.get("/user/:id")
+        @cache(60)
+        async def handler():
+            return random.randint(0, 9999)
+
+        await self.call("/user/1")
+        await self.call("/user/10")
+        await self.call("/user/2")
+
+        self.assertEqual(await get_cache().invalidate_prefix("/user/1#"), 1)
+        self.assertEqual(await get_cache().invalidate_prefix("/user/"), 2)
+        self.assertEqual(len(get_cache()), 0)
+
+    async def test_tags_are_dropped_with_their_entry(self):
+        memory = get_cache()
+        await memory.set("a", 1, 60, tags=["t"])
+        await memory.set("a", 2, 60)
+        await memory.set("b", 3, 60, tags=["t"])
+        await memory.delete("b")
+
+        self.assertEqual(await memory.invalidate_tags("t"), 0)
+        self.assertEqual(await memory.get("a"), 2)
+
+
+class TestSharedMemoryCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "cache")
+        self.cache = SharedMemoryCache(path=self.path, buckets=1, ways=2, slot_size=256)
+
+    def tearDown(self):
+        self.cache.close()
+        self.cache.unlink()
+
+    async def test_entries_are_shared_between_instances(self):
+        other = SharedMemoryCache(path=self.path, buckets=1, ways=2, slot_size=256)
+        await self.cache.set("a", {"value": 1}, 60)
+
+        self.assertEqual(await other.get("a"), {"value": 1})
+
+        await other.clear()
+        self.assertIsNone(await self.cache.get("a"))
+        other.close()
+
+    async def test_entries_are_shared_between_processes(self):
+        proc = multiprocessing.Process(
+            target=_write_from_another_process, args=(self.path,)
+        )
+        proc.start()
+        proc.join()
+
+        self.assertEqual(await self.cache.get("from-child"), {"pid": proc.pid})
+
+    async def test_file_with_another_layout_is_replaced(self):
+        other = SharedMemoryCache(path=self.path, buckets=2, ways=2, slot_size=256)
+        await other.set("a", 1, 60)
+
+        self.assertEqual(await other.get("a"), 1)
+        # the first instance keeps working on the file it mapped
+        await self.cache.set("b", 2, 60)
+        self.assertEqual(await self.cache.get("b"), 2)
+        other.close()
+
+    async def test_expiry(self):
+        await self.cache.set("a", 1, 0)
+        self.assertIsNone(await self.cache.get("a"))
+
+    async def test_lru_eviction_within_bucket(self):
+        await self.cache.set("a", 1, 60)
+        await self.cache.set("b", 2, 60)
+        await self.cache.get("a")
+        await self.cache.set("c", 3, 60)
+
+        self.assertEqual(await self.cache.get("a"), 1)
+        self.assertIsNone(await self.cache.get("b"))
+        self.assertEqual(await self.cache.get("c"), 3)
+
+    async def test_values_larger_than_a_slot_are_skipped(self):
+        await self.cache.set("a", b"small", 60)
+        await self.cache.set("a", b"x" * 1024, 60)
+
+        self.assertIsNone(await self.cache.get("a"))
+
+    async def test_invalidate_tags_and_prefix(self):
+        self.cache.close()
+        self.cache = SharedMemoryCache(path=self.path, buckets=4, ways=2)
+        other = SharedMemoryCache(path=self.path, buckets=4, ways=2)
+        await self.cache.set("/user/1#a", 1, 60, tags=["user:1"])
+        await self.cache.set("/user/2#a", 2, 60, tags=["user:2", "users"])
+        await self.cache.set("/team/1#a", 3, 60)
+
+        self.assertEqual(await other.invalidate_tags("user:1", "missing"), 1)
+        self.assertIsNone(await self.cache.get("/user/1#a"))
+        self.assertEqual(await other.invalidate_prefix("/user/"), 1)
+        self.assertIsNone(await self.cache.get("/user/2#a"))
+        self.assertEqual(await self.cache.get("/team/1#a"), 3)
+        other.close()
+
+    async def test_cache_decorator(self):
+        set_cache(self.cache)
+        app = App()
+
+        @app.get("/cached_number")
+        @cache(5)
+        async def handler():
+            return random.randint(0, 9999)
+
+        req = Request("GET", "/cached_number")
+        first_call = await app._get_and_call_handler("GET", "/cached_number", req)
+        second_call = await app._get_and_call_handler("GET", "/cached_number", req)
+
+        self.assertEqual(first_call, second_call)
+
+
+def _use_disk_cache(disk):
+    async def use():
+        assert await disk.get("a") == 1
+        await disk.set("b", 2, 60)
+
+    asyncio.run(use())
+
+
+class TestDiskCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "cache.db")
+        self.disk = DiskCache(self.path)
+
+    def tearDown(self):
+        self.disk.close()
+
+    async def test_entries_survive_restart(self):
+        await self.disk.set("a", {"value": 1}, 60)
+        self.disk.close()
+
+        self.disk = DiskCache(self.path)
+        self.assertEqual(await self.disk.get("a"), {"value": 1})
+
+    async def test_expiry_and_delete(self):
+        await self.disk.set("a", 1, 0)
+        await self.disk.set("b", 2, 60)
+        await self.disk.delete("b")
+
+        self.assertIsNone(await self.disk.get("a"))
+        self.assertIsNone(await self.disk.get("b"))
+
+    async def test_lru_eviction_by_bytes(self):
+        self.disk.close()
+        self.disk = DiskCache(self.path, max_bytes=2500)
+        await self.disk.set("a", b"x" * 1000, 60)
+        await self.disk.set("b", b"x" * 1000, 60)
+        await self.disk.get("a")
+        await self.disk.set("c", b"x" * 1000, 60)
+
+        self.assertIsNotNone(await self.disk.get("a"))
+        self.assertIsNone(await self.disk.get("b"))
+        self.assertIsNotNone(await self.disk.get("c"))
+
+    async def test_usable_after_fork(self):
+        # used in the parent before forking, like an app imported by the
+        # `ziplineio serve` master
+        await self.disk.set("a", 1, 60)
+
+        child = multiprocessing.get_context("fork").Process(
+            target=_use_disk_cache, args=(self.disk,)
+        )
+        child.start()
+        child.join(10)
+        if child.is_alive():
+            child.kill()
+            self.fail("the disk cache hung in the forked child")
+
+        self.assertEqual(child.exitcode, 0)
+        self.assertEqual(await self.disk.get("b"), 2)
+
+    async def test_invalidate_tags_and_prefix(self):
+        await self.disk.set("/user/1#a", 1, 60, tags=["user:1", "users"])
+        await self.disk.set("/user/2#a", 2, 60, tags=["users"])
+        await self.disk.set("/team/1#a", 3, 60, tags=["teams"])
+
+        self.assertEqual(await self.disk.invalidate_tags("user:1"), 1)
+        self.assertEqual(await self.disk.invalidate_tags("users"), 1)
+        self.assertEqual(await self.disk.invalidate_prefix("/team/"), 1)
+        self.assertEqual((await self.disk.stats())["entries"], 0)
+
+
+class TestTieredCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "cache.db")
+        self.disk = DiskCache(self.path)
+        self.cache = TieredCache(self.disk, max_memory_item_size=100)
+
+    def tearDown(self):
+        self.disk.close()
+
+    async def test_large_values_stay_on_disk(self):
+        await self.cache.set("small", b"x", 60)
+        await self.cache.set("large", b"x" * 1000, 60)
+
+        self.assertEqual(await self.cache.memory.get("small"), b"x")
+        self.assertIsNone(await self.cache.memory.get("large"))
+        self.assertEqual(await self.cache.get("large"), b"x" * 1000)
+
+    async def test_small_values_are_promoted_from_disk(self):
+        await self.cache.set("small", b"x", 60)
+        restarted = TieredCache(self.disk, max_memory_item_size=100)
+
+        self.assertIsNone(await restarted.memory.get("small"))
+        self.assertEqual(await restarted.get("small"), b"x")
+        self.assertEqual(await restarted.memory.get("small"), b"x")
+
+    async def test_values_demoted_from_memory_are_still_served(self):
+        cache = TieredCache(self.disk, memory=MemoryCache(max_entries=1))
+        await cache.set("a", 1, 60)
+        await cache.set("b", 2, 60)
+
+        self.assertIsNone(await cache.memory.get("a"))
+        self.assertEqual(await cache.get("a"), 1)
+
+    async def test_invalidate_tags_in_both_tiers(self):
+        await self.cache.set("small", b"x", 60, tags=["t"])
+        await self.cache.set("large", b"x" * 1000, 60, tags=["t"])
+
+        self.assertEqual(await self.cache.invalidate_tags("t"), 2)
+        self.assertIsNone(await self.cache.get("small"))
+        self.assertIsNone(await self.cache.get("large"))
+
+    async def test_max_memory_ttl_bounds_the_memory_tier(self):
+        cache = TieredCache(self.disk, max_memory_ttl=0.05)
+        await cache.set("a", 1, 60)
+        await asyncio.sleep(0.1)
+
+        self.assertIsNone(await cache.memory.get("a"))
+        self.assertEqual(await cache.get("a"), 1)
+
+
+class TestRawResponseCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+        set_cache(MemoryCache())
+
+    async def asgi_get(self, path):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+        }
+        messages = []
+
+        async def receive():
+            return {"body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app()(scope, receive, send)
+        return messages
+
+    async def test_hits_are_sent_pre_encoded(self):
+        calls = 0
+
+        @self.app.get("/report")
+        @cache(5, raw=True)
+        async def handler():
+            nonlocal calls
+            calls += 1
+            return {"rows": [1, 2, 3]}
+
+        first = await self.asgi_get("/report")
+        with patch("ziplineio.response.json.dumps") as dumps:
+            second = await self.asgi_get("/report")
+            dumps.assert_not_called()
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second[0]["status"], 200)
+        self.assertIn((b"content-type", b"application/json"), second[0]["headers"])
+        self.assertIn((b"x-powered-by", b"zipline"), second[0]["headers"])
+        self.assertEqual(second[1]["body"], b'{"rows": [1, 2, 3]}')
+
+    async def test_cached_value_is_an_encoded_response(self):
+        @self.app.get("/report")
+        @cache(5, raw=True)
+        async def handler():
+            return "report"
+
+        req = Request("GET", "/report")
+        await self.app._get_and_call_handler("GET", "/report", req)
+        hit = await self.app._get_and_call_handler("GET", "/report", req)
+
+        self.assertIsInstance(hit, EncodedResponse)
+        self.assertIs(format_response(hit, {}), hit.raw)
+
+
+class TestCacheStats(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+        set_cache(MemoryCache(max_entries=2))
+
+    async def call(self, path):
+        return await self.app._get_and_call_handler("GET", path, Request("GET", path))
+
+    async def test_memory_cache_stats(self):
+        c = get_cache()
+        await c.set("a", b"12345", 60)
+        await c.set("b", b"1", 0)
+        await c.get("a")
+        await c.get("b")
+        await c.get("missing")
+        await c.set("c", b"1", 60)
+        await c.set("d", b"1", 60)
+
+        stats = await c.stats()
+
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["bytes"], 2)
+
+    async def test_handler_stats(self):
+        @self.app.get("/stats")
+        @cache(5)
+        async def handler():
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        await asyncio.gather(self.call("/stats"), self.call("/stats"))
+        await self.call("/stats")
+
+        name = f"{__name__}.TestCacheStats.test_handler_stats.<locals>.handler"
+        stats = get_handler_stats()[name]
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["coalesced"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["load_time"]["count"], 1)
+        self.assertEqual(stats["load_time"]["buckets"]["+Inf"], 1)
+
+    async def test_metrics_endpoint(self):
+        @self.app.get("/cached")
+        @cache(5)
+        async def handler():
+            return "ok"
+
+        self.app.get("/metrics")(metrics_handler)
+        await self.call("/cached")
+
+        response = await self.call("/metrics")
+        body = str(response.body)
+
+        self.assertEqual(response.status, 200)
+        self.assertIn("ziplineio_cache_misses_total 1", body)
+        self.assertIn("ziplineio_cache_entries 1", body)
+        self.assertIn('ziplineio_cache_handler_misses_total{handler="', body)
+        self.assertIn('ziplineio_cache_handler_load_seconds_bucket{handler="', body)
+
+    async def test_backend_stats(self):
+        directory = tempfile.mkdtemp()
+        shared = SharedMemoryCache(path=os.path.join(directory, "shm"), buckets=4)
+        disk = DiskCache(os.path.join(directory, "cache.db"))
+        tiered = TieredCache(disk)
+
+        for c in (shared, tiered):
+            await c.set("a", b"value", 60)
+            await c.get("a")
+            await c.get("missing")
+
+        shared_stats = await shared.stats()
+        tiered_stats = await tiered.stats()
+
+        self.assertEqual(shared_stats["entries"], 1)
+        self.assertEqual(shared_stats["hits"], 1)
+        self.assertEqual(shared_stats["misses"], 1)
+        self.assertEqual(tiered_stats["memory"]["hits"], 1)
+        self.assertEqual(tiered_stats["disk"]["misses"], 1)
+        self.assertEqual(tiered_stats["disk"]["entries"], 1)
+
+        shared.close()
+        disk.close()
+
+
+class TestHttpCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+        self.app.middleware([http_cache()])
+        set_cache(MemoryCache())
+        self.calls = 0
+
+    def count(self, headers):
+        self.calls += 1
+        return Response(200, headers, Body.from_str(str(self.calls)))
+
+    async def call(self, path, headers={}, method="GET"):
+        req = Request(method, path, headers=headers)
+        response = await self.app._get_and_call_handler(method, path, req)
+        return format_response(response, {})
+
+    async def test_max_age_and_s_maxage(self):
+        @self.app.get("/max-age")
+        async def max_age():
+            return self.count({"Cache-Control": "max-age=60"})
+
+        @self.app.get("/s-maxage")
+        async def s_maxage():
+            return self.count({"Cache-Control": "max-age=60, s-maxage=0"})
+
+        first = await self.call("/max-age")
+        second = await self.call("/max-age")
+        self.assertEqual(first["body"], second["body"])
+        self.assertIn((b"age", b"0"), second["headers"])
+
+        # s-maxage takes precedence for a shared cache
+        first = await self.call("/s-maxage")
+        second = await self.call("/s-maxage")
+        self.assertNotEqual(first["body"], second["body"])
+
+    async def test_uncacheable_responses(self):
+        directives = ["private, max-age=60", "no-store", "no-cache, max-age=60", ""]
+        for i, cache_control in enumerate(directives):
+
+            @self.app.get(f"/uncacheable/{i}")
+            async def handler():
+                return self.count({"Cache-Control": cache_control})
+
+            first = await self.call(f"/uncacheable/{i}")
+            second = await self.call(f"/uncacheable/{i}")
+            self.assertNotEqual(first["body"], second["body"], cache_control)
+
+    async def test_authorized_requests_need_public(self):
+        @self.app.get("/me")
+        async def me():
+            return self.count({"Cache-Control": "max-age=60"})
+
+        @self.app.get("/shared")
+        async def shared():
+            return self.count({"Cache-Control": "public, max-age=60"})
+
+        auth = {"authorization": "Bearer token"}
+        self.assertNotEqual(
+            (await self.call("/me", auth))["body"],
+            (await self.call("/me", auth))["body"],
+        )
+        self.assertEqual(
+            (await self.call("/shared", auth))["body"],
+            (await self.call("/shared", auth))["body"],
+        )
+
+    async def test_vary(self):
+        @self.app.get("/greeting")
+        async def greeting(req):
+            self.calls += 1
+            body = Body.from_str(req.headers.get("accept-language", ""))
+            headers = {"Cache-Control": "max-age=60", "Vary": "Accept-Language"}
+            return Response(200, headers, body)
+
+        en = await self.call("/greeting", {"accept-language": "en"})
+        fr = await self.call("/greeting", {"accept-language": "fr"})
+        en_again = await self.call("/greeting", {"accept-language": "en", "x": "1"})
+
+        self.assertEqual((en["body"], fr["body"]), (b"en", b"fr"))
+        self.assertEqual(en_again["body"], b"en")
+        self.assertEqual(self.calls, 2)
+
+    async def test_only_get_is_cached(self):
+        @self.app.post("/submit")
+        async def submit():
+            return self.count({"Cache-Control": "max-age=60"})
+
+        first = await self.call("/submit", method="POST")
+        second = await self.call("/submit", method="POST")
+        self.assertNotEqual(first["body"], second["body"])
+
+
+class TestRedisCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = RespServer(password="secret")
+        port = await self.server.start()
+        self.cache = RedisCache(port=port, password="secret", pool_size=2)
+
+    async def asyncTearDown(self):
+        self.cache.close()
+        await self.server.stop()
+
+    async def test_get_set_delete(self):
+        await self.cache.set("a", {"value": 1}, 60)
+        await self.cache.set("b", 2, 0)
+
+        self.assertEqual(await self.cache.get("a"), {"value": 1})
+        self.assertIsNone(await self.cache.get("b"))
+
+        await self.cache.delete("a")
+        self.assertIsNone(await self.cache.get("a"))
+        self.assertEqual((await self.cache.stats())["hits"], 1)
+
+    async def test_keys_are_namespaced(self):
+        other = RedisCache(port=self.cache.port, password="secret", namespace="other:")
+        await self.cache.set("a", 1, 60)
+        await other.set("a", 2, 60)
+        await self.cache.clear()
+
+        self.assertIsNone(await self.cache.get("a"))
+        self.assertEqual(await other.get("a"), 2)
+        other.close()
+
+    async def test_concurrent_commands_are_pipelined_on_a_bounded_pool(self):
+        await asyncio.gather(*(self.cache.set(str(i), i, 60) for i in range(100)))
+        values = await asyncio.gather(*(self.cache.get(str(i)) for i in range(100)))
+
+        self.assertEqual(values, list(range(100)))
+        self.assertLessEqual(self.server.connections, 2)
+        self.assertGreater(self.server.max_pipeline, 1)
+
+    async def test_invalidation(self):
+        await self.cache.set("/user/1#a", 1, 60, tags=["user:1", "users"])
+        await self.cache.set("/user/2#a", 2, 60, tags=["users"])
+        await self.cache.set("/team/1#a", 3, 60)
+
+        self.assertEqual(await self.cache.invalidate_tags("user:1"), 1)
+        self.assertEqual(await self.cache.invalidate_prefix("/user/"), 1)
+        self.assertEqual(await self.cache.get("/team/1#a"), 3)
+
+    async def test_tag_sets_expire_with_their_longest_lived_entry(self):
+        tag_key = b"ziplineio:\x00tag:users"
+        await self.cache.set("a", 1, 60, tags=["users"])
+        expires_at = self.server.expires[tag_key]
+        self.assertAlmostEqual(expires_at, time.time() + 60, delta=1)
+
+        await self.cache.set("b", 2, 120, tags=["users"])
+        self.assertAlmostEqual(self.server.expires[tag_key], expires_at + 60, delta=1)
+
+        await self.cache.set("c", 3, 1, tags=["users"])
+        self.assertAlmostEqual(self.server.expires[tag_key], expires_at + 60, delta=1)
+
+        await self.cache.set("d", 4, 0.05, tags=["temporary"])
+        await asyncio.sleep(0.1)
+        self.assertEqual(
+            await self.cache.execute(["SMEMBERS", "ziplineio:\x00tag:temporary"]), [[]]
+        )
+
+    async def test_pluggable_serializer(self):
+        cache = RedisCache(port=self.cache.port, password="secret", serializer=json)
+        await cache.set("a", {"value": 1}, 60)
+
+        self.assertEqual(self.server.data[b"ziplineio:a"], b'{"value": 1}')
+        self.assertEqual(await cache.get("a"), {"value": 1})
+        cache.close()
+
+    async def test_malformed_reply_fails_pending_commands(self):
+        async def reply_garbage(reader, writer):
+            await reader.read(65536)
+            writer.write(b":not a number\r\n")
+            await writer.drain()
+
+        server = await asyncio.start_server(reply_garbage, "127.0.0.1", 0)
+        cache = RedisCache(port=server.sockets[0].getsockname()[1])
+        try:
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(cache.get("a"), 1)
+        finally:
+            cache.close()
+            server.close()
+
+    async def test_error_replies_are_raised(self):
+        cache = RedisCache(port=self.cache.port, password="wrong")
+        with self.assertRaises(RespError):
+            await cache.get("a")
+        cache.close()
+
+    async def test_cache_decorator(self):
+        set_cache(self.cache)
+        app = App()
+
+        @app.get("/cached_number")
+        @cache(5)
+        async def handler():
+            return random.randint(0, 9999)
+
+        req = Request("GET", "/cached_number")
+        first_call = await app._get_and_call_handler("GET", "/cached_number", req)
+        second_call = await app._get_and_call_handler("GET", "/cached_number", req)
+
+        self.assertEqual(first_call, second_call)
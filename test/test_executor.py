@@ -0,0 +1,136 @@
+import asyncio
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+from ziplineio import settings
+from ziplineio.app import App
+from ziplineio.exception import ServiceUnavailableHttpException
+from ziplineio.executor import ProcessExecutor, ThreadExecutor
+from ziplineio.request import Request
+from ziplineio.response import format_response
+
+
+# Module-level, so that the process pool can pickle it
+def process_handler(req):
+    return {"pid": os.getpid(), "path": req.path}
+
+
+class TestExecutors(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+
+    async def call(self, path):
+        req = Request("GET", path)
+        return await self.app._get_and_call_handler("GET", path, req)
+
+    async def test_inline_and_thread_executors(self):
+        @self.app.get("/inline", executor="inline")
+        def inline():
+            return threading.current_thread().name
+
+        @self.app.get("/thread", executor="thread")
+        def thread():
+            return threading.current_thread().name
+
+        self.assertEqual(await self.call("/inline"), threading.current_thread().name)
+        self.assertTrue((await self.call("/thread")).startswith("ziplineio-executor"))
+
+    async def test_custom_executor(self):
+        self.app.executor("io", ThreadExecutor(max_workers=2))
+
+        @self.app.get("/user/:id", executor="io")
+        def user(req):
+            return {"id": req.path_params["id"]}
+
+        self.assertEqual(await self.call("/user/1"), {"id": "1"})
+
+    async def test_full_queue_returns_503(self):
+        self.app.executor("small", ThreadExecutor(max_workers=1, max_queue=1))
+        release = threading.Event()
+
+        @self.app.get("/slow", executor="small")
+        def slow():
+            release.wait(5)
+            return "done"
+
+        calls = [asyncio.create_task(self.call("/slow")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(*calls)
+
+        self.assertEqual(results[:2], ["done", "done"])
+        self.assertIsInstance(results[2], ServiceUnavailableHttpException)
+        self.assertEqual(format_response(results[2], {})["status"], 503)
+
+    async def test_default_thread_pool_queues_calls(self):
+        max_workers = self.app._executors["thread"].max_workers
+        release = threading.Event()
+
+        @self.app.get("/slow", executor="thread")
+        def slow():
+            release.wait(5)
+            return "done"
+
+        calls = [
+            asyncio.create_task(self.call("/slow")) for _ in range(2 * max_workers)
+        ]
+        await asyncio.sleep(0.05)
+        release.set()
+
+        self.assertEqual(await asyncio.gather(*calls), ["done"] * 2 * max_workers)
+
+    async def test_default_thread_pool_queue_setting(self):
+        release = threading.Event()
+
+        @self.app.get("/slow", executor="thread")
+        def slow():
+            release.wait(5)
+            return "done"
+
+        with patch.object(settings, "THREAD_POOL_MAX_QUEUE", 0):
+            max_workers = self.app._executors["thread"].max_workers
+            calls = [
+                asyncio.create_task(self.call("/slow")) for _ in range(max_workers + 1)
+            ]
+            await asyncio.sleep(0.05)
+            release.set()
+            results = await asyncio.gather(*calls)
+
+        self.assertEqual(results[:max_workers], ["done"] * max_workers)
+        self.assertIsInstance(results[-1], ServiceUnavailableHttpException)
+
+    async def test_timed_out_calls_stay_queued_until_they_return(self):
+        self.app.executor("small", ThreadExecutor(max_workers=1, max_queue=0))
+        release = threading.Event()
+
+        @self.app.get("/slow", executor="small", timeout=0.05)
+        def slow():
+            release.wait(5)
+            return "done"
+
+        self.assertEqual(format_response(await self.call("/slow"), {})["status"], 504)
+        # the timed out call still holds the only worker
+        result = await self.call("/slow")
+        self.assertIsInstance(result, ServiceUnavailableHttpException)
+
+        release.set()
+        await asyncio.sleep(0.05)
+        self.assertEqual(await self.call("/slow"), "done")
+
+    async def test_process_executor(self):
+        executor = ProcessExecutor(max_workers=1)
+        self.app.executor("cpu", executor)
+        handler = self.app.get("/process", executor="cpu")(process_handler)
+
+        result = await self.call("/process")
+        executor.shutdown()
+
+        self.assertIs(handler, process_handler)
+        self.assertEqual(result["path"], "/process")
+        self.assertNotEqual(result["pid"], os.getpid())
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            self.app.get("/unknown", executor="gpu")(process_handler)
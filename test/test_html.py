@@ -8,7 +8,6 @@ from ziplineio.request import Request
 from ziplineio.html.jinja import jinja
 from ziplineio.response import JinjaResponse
 
-
 env = Environment(loader=PackageLoader("test.mocks"), autoescape=select_autoescape())
 
 
@@ -0,0 +1,61 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from ziplineio import inline, settings
+from ziplineio.app import App
+from ziplineio.middleware import middleware
+from ziplineio.request import Request
+
+
+class TestInline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+
+    async def call(self, path):
+        req = Request("GET", path)
+        return await self.app._get_and_call_handler("GET", path, req)
+
+    async def test_inline_handler_runs_on_the_loop(self):
+        @self.app.get("/inline")
+        @inline
+        def inline_handler():
+            return {"thread": threading.current_thread().name}
+
+        @self.app.get("/thread")
+        def thread_handler():
+            return {"thread": threading.current_thread().name}
+
+        loop_thread = threading.current_thread().name
+        self.assertEqual(await self.call("/inline"), {"thread": loop_thread})
+        self.assertNotEqual(await self.call("/thread"), {"thread": loop_thread})
+
+    async def test_inline_policy(self):
+        threads = []
+
+        def record_thread(req):
+            threads.append(threading.current_thread().name)
+            return req
+
+        @self.app.get("/")
+        @middleware([record_thread])
+        def handler():
+            threads.append(threading.current_thread().name)
+            return "ok"
+
+        with patch.object(settings, "INLINE_SYNC", True):
+            self.assertEqual(await self.call("/"), "ok")
+
+        self.assertEqual(threads, [threading.current_thread().name] * 2)
+
+    async def test_warns_when_blocking(self):
+        @self.app.get("/slow")
+        @inline
+        def slow():
+            time.sleep(0.02)
+            return "done"
+
+        with patch.object(settings, "INLINE_WARN_AFTER", 0.01):
+            with self.assertWarnsRegex(RuntimeWarning, "slow blocked the event loop"):
+                self.assertEqual(await self.call("/slow"), "done")
@@ -6,6 +6,7 @@ from ziplineio.request import Request
 from ziplineio.app import App
 from ziplineio.middleware import middleware
 from ziplineio.response import format_response
+from ziplineio.router import Router
 from ziplineio.utils import call_handler
 
 
@@ -159,6 +160,96 @@ class TestMiddleware(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(response["message"], "Middleware test 2")
         self.assertEqual(response["app_ctx"], "some_value")
 
+    async def test_after_hooks(self):
+        req = Request(method="GET", path="/with-after-hooks")
+
+        async def outer(req):
+            return req
+
+        async def outer_after(req, response):
+            return response + ["outer"]
+
+        async def inner(req):
+            return req
+
+        async def inner_after(response, ctx):
+            return response + ["inner"]
+
+        outer.after = outer_after
+        inner.after = inner_after
+
+        @self.app.get("/with-after-hooks")
+        @middleware([outer, inner])
+        async def handler(req: Request):
+            return ["handler"]
+
+        handler, params = self.app._router.get_handler("GET", "/with-after-hooks")
+        response = await handler(req)
+
+        self.assertEqual(response, ["handler", "inner", "outer"])
+
+    async def test_after_hooks_see_not_found_responses(self):
+        seen = []
+
+        async def log(req):
+            return req
+
+        async def log_after(req, response):
+            seen.append((req.path, format_response(response, {})["status"]))
+            return response
+
+        log.after = log_after
+        self.app.middleware([log])
+
+        response = await self.app._get_and_call_handler(
+            "GET", "/missing", Request("GET", "/missing")
+        )
+
+        self.assertEqual(format_response(response, {})["status"], 404)
+        self.assertEqual(seen, [("/missing", 404)])
+
+    async def test_sync_middleware_and_errors(self):
+        req = Request(method="GET", path="/guarded")
+
+        def auth(req):
+            return req, {"user": req.headers.get("user")}
+
+        def guard(req, ctx):
+            if ctx["user"] is None:
+                raise Exception("Unauthorized")
+            return req
+
+        @self.app.get("/guarded")
+        @middleware([auth, guard])
+        async def handler(req: Request, ctx: dict):
+            return {"user": ctx["user"]}
+
+        handler, params = self.app._router.get_handler("GET", "/guarded")
+
+        req.headers = {"user": "ada"}
+        self.assertEqual(await handler(req), {"user": "ada"})
+
+        req.headers = {}
+        response = await handler(req)
+        self.assertIsInstance(response, Exception)
+        self.assertEqual(str(response), "Unauthorized")
+
+    async def test_middleware_added_after_routes(self):
+        router = Router()
+        router.middleware([lambda req: req])
+
+        @router.get("/late")
+        async def handler(req: Request, ctx: dict):
+            return ctx
+
+        async def late(req):
+            return req, {"late": True}
+
+        router.middleware([late])
+        handler, params = router.get_handler("GET", "/late")
+
+        self.assertEqual(await handler(Request("GET", "/late")), {"late": True})
+
 
 if __name__ == "__main__":
     unittest.main()
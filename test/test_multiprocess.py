@@ -1,9 +1,18 @@
+import array
+import os
+import sys
+import time
 from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 import unittest
 import asyncio
 from unittest.mock import patch
 
-from ziplineio.process_pool import SyncExecutor, run_sync_in_executor
+from ziplineio import settings
+from ziplineio.app import App
+from ziplineio.executor import ProcessExecutor
+from ziplineio.process_pool import SyncExecutor, batched, run_sync_in_executor
+from ziplineio.shm import SharedMemoryPool
 
 
 # Standalone synchronous functions that can be pickled
@@ -15,6 +24,42 @@ def another_sync_function(x):
     return x * 2
 
 
+_warm_state = None
+
+
+def warm_up(value):
+    global _warm_state
+    _warm_state = value
+
+
+def read_warm_state():
+    return _warm_state, "colorsys" in sys.modules
+
+
+def describe(data, scale=1):
+    view = memoryview(data)
+    return type(data).__name__, view.format, view.nbytes * scale, data[-1]
+
+
+def repeat(data):
+    return bytes(data) * 2
+
+
+def slow_length(data, delay):
+    time.sleep(delay)
+    return len(data)
+
+
+batch_executor = ProcessExecutor(max_workers=1, max_queue=None)
+
+
+@batched(max_batch=4, max_wait_ms=20, executor=batch_executor)
+def square(x):
+    if x < 0:
+        raise ValueError("negative")
+    return x * x
+
+
 class TestSyncExecutor(unittest.TestCase):
     def test_sync_function_in_executor(self):
         wrapped_sync_function = run_sync_in_executor()(sync_function)
@@ -58,6 +103,189 @@ class TestSyncExecutor(unittest.TestCase):
 
         mock_shutdown.assert_called_once()
 
+    def test_decorated_functions_share_one_pool(self):
+        SyncExecutor.get_instance()
+        with patch.object(SyncExecutor, "__init__", side_effect=AssertionError):
+            wrapped_sync_function = run_sync_in_executor()(sync_function)
+            wrapped_another_sync_function = run_sync_in_executor()(
+                another_sync_function
+            )
+            self.assertEqual(asyncio.run(wrapped_sync_function(1, 2)), 3)
+            self.assertEqual(asyncio.run(wrapped_another_sync_function(2)), 4)
+
+    def test_pool_size(self):
+        executor = SyncExecutor()
+        executor._configure()
+        self.assertEqual(executor.max_workers, os.cpu_count())
+
+        # read when the pool starts, not when it's created
+        with patch.object(settings, "PROCESS_POOL_SIZE", 3):
+            executor._configure()
+        self.assertEqual(executor.max_workers, 3)
+
+    def test_worker_initializer(self):
+        executor = SyncExecutor(
+            max_workers=1, initializer=warm_up, initargs=("warm",), preload=["colorsys"]
+        )
+        result = asyncio.run(executor.run_in_executor(read_warm_state))
+        executor.shutdown()
+
+        self.assertEqual(result, ("warm", True))
+
+
+class TestSharedMemoryTransport(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.executor = ProcessExecutor(
+            max_workers=1, shared_memory=True, shared_memory_threshold=1024
+        )
+
+    async def asyncTearDown(self):
+        self.executor.shutdown()
+
+    async def test_large_arguments(self):
+        payload = bytes(range(256)) * 64
+
+        self.assertEqual(
+            await self.executor.run(describe, payload, scale=2),
+            ("bytes", "B", 2 * len(payload), 255),
+        )
+        self.assertEqual(
+            await self.executor.run(describe, data=bytearray(payload)),
+            ("bytearray", "B", len(payload), 255),
+        )
+        doubles = array.array("d", range(1024))
+        self.assertEqual(
+            await self.executor.run(describe, doubles),
+            ("memoryview", "d", 8 * 1024, 1023.0),
+        )
+        # small arguments are pickled as usual
+        self.assertEqual(
+            await self.executor.run(describe, b"small"), ("bytes", "B", 5, ord("l"))
+        )
+
+        # one block was enough: it went back to the pool after each call
+        free = self.executor._transport.pool._free
+        self.assertEqual(sum(len(blocks) for blocks in free.values()), 1)
+
+    async def test_large_results(self):
+        payload = bytes(range(256)) * 64
+
+        # the first result goes through the pipe; the next ones are written to
+        # a block sized after it
+        for _ in range(3):
+            self.assertEqual(await self.executor.run(repeat, payload), payload * 2)
+        self.assertEqual(
+            self.executor._transport._result_sizes[repeat], 2 * len(payload)
+        )
+
+    async def test_restarted_pool_gets_a_new_transport(self):
+        payload = bytes(range(256)) * 64
+        await self.executor.run(describe, payload)
+        self.executor.shutdown()
+
+        self.assertEqual(
+            await self.executor.run(describe, payload),
+            ("bytes", "B", len(payload), 255),
+        )
+
+    async def test_blocks_are_kept_until_a_cancelled_call_returns(self):
+        # start the worker, so the call is running when it is cancelled
+        await self.executor.run(describe, b"small")
+        free = self.executor._transport.pool._free
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                self.executor.run(slow_length, bytes(4096), 0.5), 0.05
+            )
+        # the worker is still reading the argument's block
+        self.assertEqual(sum(len(blocks) for blocks in free.values()), 0)
+
+        for _ in range(100):
+            if free:
+                break
+            await asyncio.sleep(0.05)
+        self.assertEqual(sum(len(blocks) for blocks in free.values()), 1)
+
+
+class TestSharedMemoryPool(unittest.TestCase):
+    def test_blocks_released_after_close_are_destroyed(self):
+        pool = SharedMemoryPool(min_size=1024)
+        block = pool.acquire(1024)
+        pool.close()
+
+        pool.release(block)
+
+        self.assertEqual(pool._free, {})
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=block.name)
+
+
+class TestBatched(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        batch_executor.shutdown()
+
+    async def test_concurrent_calls_are_batched(self):
+        with patch.object(batch_executor, "run", wraps=batch_executor.run) as run:
+            results = await asyncio.gather(*(square(x) for x in range(10)))
+
+        self.assertEqual(results, [x * x for x in range(10)])
+        # two full batches, and the rest after `max_wait_ms`
+        self.assertEqual([len(call.args[2]) for call in run.call_args_list], [4, 4, 2])
+
+    async def test_errors_are_returned_to_their_caller(self):
+        results = await asyncio.gather(
+            square(2), square(-1), square(3), return_exceptions=True
+        )
+
+        self.assertEqual(results[0], 4)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], 9)
+
+
+class TestLifespan(unittest.IsolatedAsyncioTestCase):
+    async def test_executors_start_and_shut_down_with_the_app(self):
+        app = App()
+        executor = ProcessExecutor(max_workers=1)
+        app.executor("cpu", executor)
+        app.get("/sum", executor="cpu")(sync_function)
+
+        started = []
+        messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+
+        async def receive():
+            started.append(executor._pool is not None)
+            return next(messages)
+
+        sent = []
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await app()({"type": "lifespan"}, receive, send)
+
+        self.assertEqual(started, [False, True])
+        self.assertEqual(
+            sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        )
+        self.assertIsNone(executor._pool)
+
+    async def test_apps_share_the_process_pool(self):
+        pool = SyncExecutor.get_instance()
+        first, second = App(), App()
+        first.get("/sum", executor="process")(sync_function)
+        second.get("/sum", executor="process")(sync_function)
+
+        with patch.object(settings, "PROCESS_POOL_SIZE", 1):
+            await first.startup()
+            await second.startup()
+        self.assertEqual(pool.max_workers, 1)
+
+        await first.shutdown()
+        self.assertIsNotNone(pool._pool)
+        await second.shutdown()
+        self.assertIsNone(pool._pool)
+
 
 if __name__ == "__main__":
     unittest.main()
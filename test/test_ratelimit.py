@@ -0,0 +1,130 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from ziplineio.app import App
+from ziplineio.cache import MemoryCache, SharedMemoryCache
+from ziplineio.exception import TooManyRequestsHttpException
+from ziplineio.middleware import middleware
+from ziplineio.ratelimit import (
+    CacheBuckets,
+    MemoryBuckets,
+    header,
+    path_param,
+    rate_limit,
+)
+from ziplineio.request import Request
+from ziplineio.response import format_response
+from ziplineio.router import Router
+
+
+class TestRateLimit(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+
+    async def call(self, path, headers={}, client=("10.0.0.1", 5000)):
+        req = Request("GET", path, headers=headers, client=client)
+        return await self.app._get_and_call_handler("GET", path, req)
+
+    async def test_limits_by_client_ip(self):
+        @self.app.get("/search")
+        @middleware([rate_limit(1, per=60, burst=2)])
+        async def search():
+            return "results"
+
+        self.assertEqual(await self.call("/search"), "results")
+        self.assertEqual(await self.call("/search"), "results")
+
+        limited = await self.call("/search")
+        self.assertIsInstance(limited, TooManyRequestsHttpException)
+        raw = format_response(limited, {})
+        self.assertEqual(raw["status"], 429)
+        self.assertIn((b"Retry-After", b"60"), raw["headers"])
+
+        # other clients have their own bucket
+        self.assertEqual(
+            await self.call("/search", client=("10.0.0.2", 5000)), "results"
+        )
+
+    async def test_refill(self):
+        @self.app.get("/search")
+        @middleware([rate_limit(10, per=1, burst=1)])
+        async def search():
+            return "results"
+
+        now = time.monotonic()
+        with patch("ziplineio.ratelimit.time.monotonic", return_value=now):
+            self.assertEqual(await self.call("/search"), "results")
+            self.assertIsInstance(await self.call("/search"), Exception)
+        with patch("ziplineio.ratelimit.time.monotonic", return_value=now + 0.1):
+            self.assertEqual(await self.call("/search"), "results")
+
+    async def test_router_middleware_and_key_functions(self):
+        router = Router()
+        router.middleware([rate_limit(1, per=60, key=header("X-Api-Key"))])
+
+        @router.get("/data")
+        async def data():
+            return "data"
+
+        @self.app.get("/user/:id")
+        @middleware([rate_limit(1, per=60, key=path_param("id"))])
+        async def user(req):
+            return req.path_params["id"]
+
+        self.app.router("/api", router)
+
+        key = {"x-api-key": "abc"}
+        self.assertEqual(await self.call("/api/data", headers=key), "data")
+        self.assertIsInstance(await self.call("/api/data", headers=key), Exception)
+        # requests without a key aren't limited
+        self.assertEqual(await self.call("/api/data"), "data")
+        self.assertEqual(await self.call("/api/data"), "data")
+
+        self.assertEqual(await self.call("/user/1"), "1")
+        self.assertEqual(await self.call("/user/2"), "2")
+        self.assertIsInstance(await self.call("/user/1"), Exception)
+
+    async def test_idle_keys_are_evicted(self):
+        buckets = MemoryBuckets(max_keys=3)
+        now = time.monotonic()
+        with patch("ziplineio.ratelimit.time.monotonic", return_value=now):
+            for i in range(5):
+                await buckets.take(str(i), 1.0, 1.0, 1)
+        # at most max_keys are kept
+        self.assertEqual(len(buckets), 3)
+
+        with patch("ziplineio.ratelimit.time.monotonic", return_value=now + 2):
+            await buckets.take("new", 1.0, 1.0, 1)
+            await buckets.take("new", 1.0, 1.0, 1)
+        # refilled buckets are dropped as requests come in
+        self.assertEqual(len(buckets), 1)
+
+
+class TestCacheBuckets(unittest.IsolatedAsyncioTestCase):
+    async def check_limits(self, cache):
+        limit = rate_limit(1, per=60, backend=CacheBuckets(cache))
+        req = Request("GET", "/", client=("10.0.0.1", 5000))
+
+        self.assertIs(await limit(req), req)
+        self.assertIsInstance(await limit(req), TooManyRequestsHttpException)
+        self.assertIsNotNone(await cache.get("ratelimit:10.0.0.1"))
+
+    async def test_memory_cache(self):
+        await self.check_limits(MemoryCache())
+
+    async def test_shared_memory_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SharedMemoryCache(path=os.path.join(directory, "cache"))
+            try:
+                await self.check_limits(cache)
+                # another worker sees the same bucket
+                other = SharedMemoryCache(path=os.path.join(directory, "cache"))
+                limit = rate_limit(1, per=60, backend=CacheBuckets(other))
+                req = Request("GET", "/", client=("10.0.0.1", 5000))
+                self.assertIsInstance(await limit(req), TooManyRequestsHttpException)
+                other.close()
+            finally:
+                cache.close()
@@ -1,7 +1,7 @@
 import unittest
 
 from ziplineio.app import App
-from ziplineio.exception import BaseHttpException
+from ziplineio.exception import BaseHttpException, NotFoundHttpException
 from ziplineio.request import Body, Request
 from ziplineio.response import (
     Response,
@@ -30,6 +30,30 @@ class TestResponse(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(r.get_headers()["Content-Type"], "text/css")
         self.assertTrue("background-color: #f0f0f0;" in str(r.body))
 
+    async def test_static_file_not_found(self):
+        req = Request(method="GET", path="/static/css/missing.css")
+        r = await self.app._get_and_call_handler("GET", "/static/css/missing.css", req)
+
+        self.assertIsInstance(r, NotFoundHttpException)
+
+    async def test_static_file_outside_mount(self):
+        req = Request(method="GET", path="/static/../templates/home.html")
+        r = await self.app._get_and_call_handler(
+            "GET", "/static/../templates/home.html", req
+        )
+
+        self.assertIsInstance(r, NotFoundHttpException)
+
+    async def test_static_mount_does_not_wrap_routes(self):
+        @self.app.get("/after-static")
+        async def after_static(req):
+            return "after"
+
+        handler, _ = self.app.get_handler("GET", "/after-static")
+
+        self.assertIs(handler, after_static)
+        self.assertEqual(self.app._router._router_level_middelwares, [])
+
 
 class TestFormatBody(unittest.TestCase):
     def test_format_body_dict(self):
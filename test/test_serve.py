@@ -0,0 +1,87 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import unittest
+
+import httpx
+
+from ziplineio.serve import bind_socket, import_app
+
+PORT = 5061
+
+
+class TestImportApp(unittest.TestCase):
+    def test_import_app(self):
+        from test.mocks.serve_app import app
+
+        self.assertIs(import_app("test.mocks.serve_app:app"), app)
+
+    def test_invalid_target(self):
+        with self.assertRaises(ValueError):
+            import_app("test.mocks.serve_app")
+
+    def test_reuse_port_sockets_share_a_port(self):
+        first = bind_socket("127.0.0.1", 0, reuse_port=True)
+        port = first.getsockname()[1]
+        second = bind_socket("127.0.0.1", port, reuse_port=True)
+
+        self.assertEqual(second.getsockname()[1], port)
+        first.close()
+        second.close()
+
+
+class TestServe(unittest.TestCase):
+    def serve(self, *args):
+        env = {**os.environ, "PYTHONPATH": os.path.join(os.getcwd(), "src")}
+        self.master = subprocess.Popen(
+            [sys.executable, "-m", "ziplineio", "serve", "test.mocks.serve_app:app"]
+            + ["--port", str(PORT), "--workers", "2", "--log-level", "warning"]
+            + list(args),
+            env=env,
+        )
+
+    def tearDown(self):
+        if self.master.poll() is None:
+            self.master.kill()
+            self.master.wait()
+
+    def worker_pids(self, timeout=10):
+        """Collect worker pids until two distinct ones answered."""
+        pids = set()
+        deadline = time.monotonic() + timeout
+        while len(pids) < 2 and time.monotonic() < deadline:
+            try:
+                # a new connection each time, so both workers get a chance
+                response = httpx.get(f"http://127.0.0.1:{PORT}/pid")
+                pids.add(response.json()["pid"])
+            except httpx.HTTPError:
+                time.sleep(0.05)
+        return pids
+
+    def test_reuse_port(self):
+        self.serve("--reuse-port")
+        self.assertEqual(len(self.worker_pids()), 2)
+
+        self.master.send_signal(signal.SIGTERM)
+        self.assertEqual(self.master.wait(timeout=10), 0)
+
+    def test_workers_are_restarted_and_stopped(self):
+        self.serve()
+        pids = self.worker_pids()
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(self.master.pid, pids)
+
+        crashed = pids.pop()
+        os.kill(crashed, signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            new_pids = self.worker_pids()
+            if crashed not in new_pids and len(new_pids) == 2:
+                break
+        self.assertEqual(len(new_pids), 2)
+        self.assertNotIn(crashed, new_pids)
+
+        self.master.send_signal(signal.SIGTERM)
+        self.assertEqual(self.master.wait(timeout=10), 0)
@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from ziplineio import settings
+from ziplineio.app import App
+from ziplineio.exception import GatewayTimeoutHttpException
+from ziplineio.request import Request
+from ziplineio.request_context import remaining_time
+from ziplineio.response import format_response
+from ziplineio.router import Router
+
+
+class TestTimeouts(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+
+    async def call(self, path):
+        req = Request("GET", path)
+        return await self.app._get_and_call_handler("GET", path, req)
+
+    async def test_route_timeout_cancels_handler(self):
+        cancelled = asyncio.Event()
+
+        @self.app.get("/slow", timeout=0.05)
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        response = await self.call("/slow")
+
+        self.assertIsInstance(response, GatewayTimeoutHttpException)
+        self.assertEqual(format_response(response, {})["status"], 504)
+        self.assertTrue(cancelled.is_set())
+
+    async def test_remaining_time(self):
+        @self.app.get("/deadline", timeout=2)
+        async def deadline():
+            return {"remaining": remaining_time()}
+
+        @self.app.get("/none")
+        async def none():
+            return {"remaining": remaining_time()}
+
+        remaining = (await self.call("/deadline"))["remaining"]
+        self.assertTrue(0 < remaining <= 2)
+        self.assertEqual(await self.call("/none"), {"remaining": None})
+        self.assertIsNone(remaining_time())
+
+    async def test_remaining_time_in_sync_handler(self):
+        @self.app.get("/sync", timeout=2)
+        def sync():
+            return {"remaining": remaining_time()}
+
+        self.assertTrue(0 < (await self.call("/sync"))["remaining"] <= 2)
+
+    async def test_app_wide_timeout(self):
+        @self.app.get("/slow")
+        async def slow():
+            await asyncio.sleep(5)
+
+        @self.app.get("/slower", timeout=0.2)
+        async def slower():
+            await asyncio.sleep(0.1)
+            return "done"
+
+        with patch.object(settings, "REQUEST_TIMEOUT", 0.05):
+            self.assertIsInstance(await self.call("/slow"), GatewayTimeoutHttpException)
+            # the route's own timeout wins
+            self.assertEqual(await self.call("/slower"), "done")
+
+    async def test_router_timeout_covers_middleware(self):
+        router = Router()
+
+        async def slow_middleware(req):
+            await asyncio.sleep(5)
+
+        router.middleware([slow_middleware])
+
+        @router.get("/user", timeout=0.05)
+        async def user():
+            return "user"
+
+        self.app.router("/api", router)
+
+        response = await self.call("/api/user")
+        self.assertIsInstance(response, GatewayTimeoutHttpException)
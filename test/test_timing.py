@@ -0,0 +1,145 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from ziplineio import settings
+from ziplineio.app import App
+from ziplineio.cache import MemoryCache, cache, set_cache
+from ziplineio.cache.decorator import _background_refreshes
+from ziplineio.dependency_injector import DependencyInjector, inject
+from ziplineio.middleware import middleware
+from ziplineio.timing import Timings, phase
+
+
+class TestTimings(unittest.TestCase):
+    def test_nested_phases_count_towards_the_innermost(self):
+        timings = Timings()
+        timings.start("handler")
+        time.sleep(0.01)
+        timings.start("db")
+        time.sleep(0.02)
+        timings.stop()
+        timings.stop()
+        timings.finish()
+
+        self.assertGreaterEqual(timings.durations["db"], 0.02)
+        self.assertLess(timings.durations["handler"], 0.02)
+        self.assertGreaterEqual(timings.total, sum(timings.durations.values()))
+        self.assertRegex(
+            timings.header(), r"^handler;dur=[\d.]+, db;dur=[\d.]+, total;dur=[\d.]+$"
+        )
+
+    def test_phase_is_a_no_op_when_timing_is_off(self):
+        with phase("db"):
+            pass
+
+
+class TestServerTiming(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.app = App()
+        # app-level services injected by other tests would add a "di" phase
+        self.app._injector = DependencyInjector()
+
+        async def auth(req):
+            await asyncio.sleep(0.01)
+            return req
+
+        @self.app.get("/")
+        @middleware([auth])
+        async def index(req):
+            with phase("db"):
+                await asyncio.sleep(0.01)
+            return "ok"
+
+    async def asgi_get(self, path):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+        }
+        messages = []
+
+        async def receive():
+            return {"body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app()(scope, receive, send)
+        return messages
+
+    async def test_server_timing_header_and_sink(self):
+        reports = []
+
+        def sink(req, timings):
+            reports.append((req.path, timings))
+
+        with patch.multiple(settings, SERVER_TIMING=True, SERVER_TIMING_SINK=sink):
+            messages = await self.asgi_get("/")
+
+        headers = dict(messages[0]["headers"])
+        metrics = [
+            m.split(";")[0] for m in headers[b"server-timing"].decode().split(", ")
+        ]
+        self.assertEqual(
+            metrics,
+            ["parse", "route", "handler", "middleware", "db", "serialize", "total"],
+        )
+
+        [(path, timings)] = reports
+        self.assertEqual(path, "/")
+        self.assertGreaterEqual(timings.durations["middleware"], 0.01)
+        self.assertGreaterEqual(timings.durations["db"], 0.01)
+
+    async def test_dependency_injection_phase(self):
+        class Clock:
+            pass
+
+        @self.app.get("/injected")
+        @inject(Clock)
+        async def injected(req, clock: Clock):
+            return "ok"
+
+        with patch.object(settings, "SERVER_TIMING", True):
+            messages = await self.asgi_get("/injected")
+
+        self.assertIn(b"di;dur=", dict(messages[0]["headers"])[b"server-timing"])
+
+    async def test_revalidation_is_not_timed_with_the_request(self):
+        set_cache(MemoryCache())
+        reports = []
+        release = asyncio.Event()
+
+        @self.app.get("/stale")
+        @cache(0.01, stale_while_revalidate=60)
+        async def stale(req):
+            with phase("db"):
+                await release.wait()
+            return "ok"
+
+        release.set()
+        await self.asgi_get("/stale")
+        await asyncio.sleep(0.02)
+        release.clear()
+
+        def sink(req, timings):
+            reports.append(timings)
+
+        with patch.multiple(settings, SERVER_TIMING=True, SERVER_TIMING_SINK=sink):
+            messages = await self.asgi_get("/stale")
+            # the refresh is still in its phase while the request finishes
+            release.set()
+            await asyncio.gather(*_background_refreshes)
+
+        self.assertEqual(messages[1]["body"], b"ok")
+        [timings] = reports
+        self.assertNotIn("db", timings.durations)
+        self.assertEqual(timings._stack, [])
+
+    async def test_off_by_default(self):
+        messages = await self.asgi_get("/")
+        self.assertNotIn(b"server-timing", dict(messages[0]["headers"]))
+        self.assertEqual(messages[1]["body"], b"ok")